@@ -2,15 +2,14 @@ from .easyeda2kicad_action import PluginInjector
 
 ## @brief Initializes and starts the EasyEDA2KiCAD Plugin Injector.
 #  
-#  The injector checks for KiCad schematic windows every **2 seconds** (2000ms).
-#  This ensures the plugin panel is injected into KiCad's UI automatically
-#  when a schematic window is detected.
+#  The injector reacts to KiCad windows being created or activated and injects
+#  the plugin panel into schematic windows as soon as they appear.
+#  A fallback timer backs off from 0.5 s to 60 s while nothing changes.
 #
 #  @note This approach avoids manual plugin initialization.
 injector = PluginInjector()
 
-## @brief Starts the injector timer.
-#  @param interval Time interval in milliseconds (2000ms = 2 seconds).
-injector.Start(2000)  # 2000 milliseconds = 2 seconds
+## @brief Subscribes the injector to window events and runs the first injection pass.
+injector.start()
 
 print("✅ EasyEDA2KiCAD Plugin Auto Injector Started")
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import argparse
+
+# Stand-in for the `easyeda2kicad` CLI used by the benchmarks: accepts the same
+# arguments as the plugin passes, sleeps instead of downloading and writes
+# synthetic outputs of a configurable size.
+#
+#   FAKE_EASYEDA2KICAD_LATENCY   seconds to sleep per part (default 0)
+#   FAKE_EASYEDA2KICAD_SIZE      approximate bytes per symbol block (default 2000)
+#   FAKE_EASYEDA2KICAD_MODEL     bytes per 3D model (default 50000)
+#   FAKE_EASYEDA2KICAD_FAIL      comma-separated LCSC IDs that fail
+
+## @brief Builds a symbol block of roughly `size` bytes.
+def make_symbol(name, part_number, size):
+    pins = []
+    pin = 0
+    body = (
+        f'  (symbol "{name}"\n'
+        f'    (property "Reference" "U" (at 0 0 0))\n'
+        f'    (property "Value" "{name}" (at 0 0 0))\n'
+        f'    (property "Footprint" "easyeda2kicad:{name}" (at 0 0 0))\n'
+        f'    (property "Datasheet" "https://lcsc.com/product-detail/{part_number}.html" (at 0 0 0))\n'
+        f'    (property "LCSC Part" "{part_number}" (at 0 0 0))\n'
+        f'    (symbol "{name}_0_1"\n'
+    )
+    length = len(body)
+    while length < size:
+        line = f'      (pin passive line (at {pin} 0 0) (length 2.54) (name "P{pin}") (number "{pin}"))\n'
+        pins.append(line)
+        length += len(line)
+        pin += 1
+    return body + "".join(pins) + "    )\n  )"
+
+## @brief Writes the outputs `easyeda2kicad --full` would produce for one part.
+def write_outputs(output, part_number, symbol_size, model_size):
+    name = f"PART_{part_number}"
+    os.makedirs(output + ".pretty", exist_ok=True)
+    os.makedirs(output + ".3dshapes", exist_ok=True)
+
+    with open(output + ".3dshapes/" + name + ".wrl", 'wb') as file:
+        file.write(b"#VRML V2.0 utf8\n" + b"#" * max(0, model_size - 16))
+    with open(output + ".pretty/" + name + ".kicad_mod", 'w') as file:
+        file.write(
+            f'(footprint "{name}"\n'
+            f'  (fp_text reference "REF**" (at 0 0) (layer "F.SilkS"))\n'
+            f'  (model "{output}.3dshapes/{name}.wrl")\n'
+            ')\n'
+        )
+    with open(output + ".kicad_sym", 'w') as file:
+        file.write(
+            "(kicad_symbol_lib\n  (version 20211014)\n  (generator fake_easyeda2kicad)\n"
+            + make_symbol(name, part_number, symbol_size) + "\n)\n"
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lcsc_id", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--full", action="store_true")
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args(argv)
+
+    time.sleep(float(os.environ.get("FAKE_EASYEDA2KICAD_LATENCY", "0")))
+    if args.lcsc_id in os.environ.get("FAKE_EASYEDA2KICAD_FAIL", "").split(","):
+        print(f"[ERROR] Failed to fetch data from EasyEDA API for part {args.lcsc_id}", file=sys.stderr)
+        return 1
+
+    write_outputs(
+        args.output,
+        args.lcsc_id,
+        int(os.environ.get("FAKE_EASYEDA2KICAD_SIZE", "2000")),
+        int(os.environ.get("FAKE_EASYEDA2KICAD_MODEL", "50000"))
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+
+# Offline benchmark and regression suite for the plugin's own overhead.
+#
+# Runs headless without network access or KiCad: the `easyeda2kicad` CLI is
+# replaced by `fake_easyeda2kicad.py` and every benchmark works inside a
+# throw-away home directory holding synthetic KiCad configuration files.
+#
+#   python3 benchmarks/run_benchmarks.py --sizes 100,1000,5000 --output results.json
+#   python3 benchmarks/run_benchmarks.py --compare results.json
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIR = os.path.dirname(BENCHMARK_DIR)
+
+## @brief Version of the result file format.
+RESULTS_VERSION = 1
+
+## @brief Points the plugin at a sandbox home directory; must run before the plugin modules are imported.
+def enter_sandbox(home):
+    os.environ["HOME"] = home
+    os.environ["USERPROFILE"] = home
+    os.environ["APPDATA"] = os.path.join(home, "AppData", "Roaming")
+    os.environ.pop("PIPX_HOME", None)
+    sys.path.insert(0, REPOSITORY_DIR)
+    sys.path.insert(0, BENCHMARK_DIR)
+
+## @brief Returns the KiCad configuration folder the plugin looks into inside the sandbox.
+def kicad_config_base(home):
+    if os.name == 'nt':
+        return os.path.join(home, "AppData", "Roaming", "kicad")
+    return os.path.join(home, ".config", "kicad")
+
+## @brief Writes an executable that behaves like the `easyeda2kicad` CLI.
+#  @return The path to pass as `easyeda2kicad_path`.
+def write_fake_converter(directory):
+    script = os.path.join(BENCHMARK_DIR, "fake_easyeda2kicad.py")
+    if os.name == 'nt':
+        path = os.path.join(directory, "easyeda2kicad.bat")
+        with open(path, 'w') as file:
+            file.write(f'@"{sys.executable}" "{script}" %*\n')
+    else:
+        path = os.path.join(directory, "easyeda2kicad")
+        with open(path, 'w') as file:
+            file.write(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n')
+        os.chmod(path, 0o755)
+    return path
+
+## @brief Writes synthetic `kicad_common.json`, `sym-lib-table` and `fp-lib-table` files.
+#  @param home Sandbox home directory.
+#  @param entries Number of environment variables and libraries per table.
+#  @param versions KiCad version folders to create.
+def write_kicad_config(home, entries, versions=("9.0",)):
+    base = kicad_config_base(home)
+    if os.path.exists(base):
+        shutil.rmtree(base)
+
+    for version in versions:
+        directory = os.path.join(base, version)
+        os.makedirs(directory)
+
+        config = {
+            "environment": {"vars": {f"SYNTHETIC_VAR_{index}": f"/opt/kicad/synthetic/{index}" for index in range(entries)}},
+            "system": {"autosave_interval": 600, "editor_name": "", "file_history_size": 9},
+        }
+        with open(os.path.join(directory, "kicad_common.json"), 'w') as file:
+            json.dump(config, file, indent=4)
+
+        for table, kind, suffix in (("sym-lib-table", "sym_lib_table", ".kicad_sym"), ("fp-lib-table", "fp_lib_table", ".pretty")):
+            lines = [f"({kind}\n", "  (version 7)\n"]
+            for index in range(entries):
+                lines.append(
+                    f'  (lib (name "Synthetic_{index}")(type "KiCad")'
+                    f'(uri "${{KICAD9_SYMBOL_DIR}}/Synthetic_{index}{suffix}")(options "")(descr "Synthetic library {index}"))\n'
+                )
+            lines.append(")\n")
+            with open(os.path.join(directory, table), 'w') as file:
+                file.writelines(lines)
+
+## @brief Writes a `.kicad_sym` library holding `symbols` synthetic symbols.
+def write_symbol_library(path, symbols, symbol_size):
+    from fake_easyeda2kicad import make_symbol
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as file:
+        file.write("(kicad_symbol_lib\n  (version 20211014)\n  (generator fake_easyeda2kicad)\n")
+        for index in range(symbols):
+            file.write(make_symbol(f"EXISTING_{index}", f"C{900000 + index}", symbol_size) + "\n")
+        file.write(")\n")
+
+## @brief Runs `run` `repeat` times and summarises the wall-clock samples.
+#  @param setup Called before every run (not timed); its return value is passed to `run`.
+#  @param run Timed callable; may return a dictionary of extra per-run metrics.
+def measure(name, params, run, repeat, setup=None):
+    samples = []
+    metrics = {}
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        started = time.perf_counter()
+        extra = run(state)
+        samples.append(time.perf_counter() - started)
+        for key, value in (extra or {}).items():
+            metrics.setdefault(key, []).append(value)
+
+    result = {
+        "name": name,
+        "params": params,
+        "runs": len(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "max": max(samples),
+    }
+    for key, values in metrics.items():
+        result[key + "_median"] = statistics.median(values)
+    print(f"  {name:<28} {json.dumps(params):<40} median {result['median'] * 1000:9.2f} ms")
+    return result
+
+## @brief Times `configure_kicad_paths` on a fresh and on an already configured profile.
+def bench_configure(home, entries, repeat):
+    from easyeda2kicad_config import configure_kicad_paths
+
+    def fresh():
+        write_kicad_config(home, entries)
+
+    def configure(_):
+        with contextlib.redirect_stdout(io.StringIO()):
+            configure_kicad_paths()
+
+    results = [measure("configure_kicad_paths", {"entries": entries, "state": "fresh"}, configure, repeat, setup=fresh)]
+    fresh()
+    configure(None)
+    results.append(measure("configure_kicad_paths", {"entries": entries, "state": "configured"}, configure, repeat))
+    return results
+
+## @brief Times `remove_easyeda2kicad_entries` on a configured profile.
+def bench_deconfigure(home, entries, repeat):
+    from easyeda2kicad_config import configure_kicad_paths
+    from easyeda2kicad_deconfig import remove_easyeda2kicad_entries
+
+    version_directory = os.path.join(kicad_config_base(home), "9.0")
+
+    def configured():
+        write_kicad_config(home, entries)
+        with contextlib.redirect_stdout(io.StringIO()):
+            configure_kicad_paths()
+
+    def deconfigure(_):
+        with contextlib.redirect_stdout(io.StringIO()):
+            remove_easyeda2kicad_entries(version_directory)
+
+    return [measure("remove_easyeda2kicad_entries", {"entries": entries}, deconfigure, repeat, setup=configured)]
+
+## @brief Times the headless import path the panel's `on_import` runs, into a library of `symbols` symbols.
+def bench_import(home, converter, symbols, repeat, latency, symbol_size, batch_size):
+    from easyeda2kicad_settings import KICAD_PATH
+    from easyeda2kicad_batch import BatchImport
+    from easyeda2kicad_symlib import SymbolLibrary
+    from easyeda2kicad_telemetry import IMPORT_LOG_PATH
+
+    output_base = os.path.join(KICAD_PATH, "easyeda2kicad")
+    if os.path.exists(KICAD_PATH):
+        shutil.rmtree(KICAD_PATH)
+    write_symbol_library(output_base + ".kicad_sym", symbols, symbol_size)
+    SymbolLibrary(output_base + ".kicad_sym").index()
+    env = dict(os.environ, FAKE_EASYEDA2KICAD_LATENCY=str(latency), FAKE_EASYEDA2KICAD_SIZE=str(symbol_size))
+    counter = [0]
+
+    def next_parts(count):
+        counter[0] += count
+        return [f"C{counter[0] - index}" for index in range(count)]
+
+    def run_batch(part_numbers, **options):
+        batch = BatchImport(part_numbers, converter, output_base, env=env, workers=4, timeout=60,
+                            cache_ttl=None, log_path=IMPORT_LOG_PATH, **options).start()
+        batch.wait()
+        failed = [result.part_number for result in batch.ordered_results() if not result.success]
+        if failed:
+            raise RuntimeError(f"benchmark import failed for {failed}: {batch.report()}")
+        converting = [job.finished_at - (job.spawned_at or job.started_at) for job in batch.jobs]
+        return {"converter": max(converting) if converting else 0.0}
+
+    def single(_):
+        return run_batch(next_parts(1))
+
+    def cached(_):
+        return run_batch(["C1"])
+
+    def batch(_):
+        return run_batch(next_parts(batch_size))
+
+    params = {"symbols": symbols, "latency": latency}
+    results = [measure("import_single", params, single, repeat)]
+    results.append(measure("import_cached", params, cached, repeat))
+    results.append(measure("import_batch", dict(params, parts=batch_size), batch, repeat))
+
+    # The plugin's own overhead is everything that is not the converter process itself
+    for result in results:
+        if "converter_median" in result:
+            result["overhead_median"] = max(0.0, result["median"] - result["converter_median"])
+
+    def rebuild(_):
+        library = SymbolLibrary(output_base + ".kicad_sym")
+        library._rebuild_index(os.stat(library.path))
+    results.append(measure("symbol_index_rebuild", {"symbols": symbols}, rebuild, repeat))
+    return results
+
+## @brief Times building the panel's search index and prefix lookups in it, over the library left by `bench_import`.
+def bench_search(symbols, repeat, lookups=1000):
+    from easyeda2kicad_settings import KICAD_PATH
+    from easyeda2kicad_search import SearchIndex
+
+    def build(_):
+        SearchIndex(KICAD_PATH).refresh()
+
+    index = SearchIndex(KICAD_PATH)
+    index.refresh()
+    prefixes = [f"C{900000 + position * 7 % max(1, symbols)}"[:4 + position % 4] for position in range(lookups)]
+
+    def lookup(_):
+        for prefix in prefixes:
+            index.lookup(prefix)
+
+    return [
+        measure("search_index_build", {"symbols": symbols}, build, repeat),
+        measure("search_lookup", {"symbols": symbols, "lookups": lookups}, lookup, repeat),
+    ]
+
+## @brief Times `inject_plugin_panel` over `frames` synthetic schematic frames; needs wxPython and a display.
+def bench_inject(frame_counts, repeat):
+    try:
+        import wx
+        app = wx.App(False)
+    except Exception as e:
+        print(f"  inject_plugin_panel          skipped ({e.__class__.__name__}: {e})")
+        return [{"name": "inject_plugin_panel", "params": {}, "skipped": str(e)}]
+
+    from easyeda2kicad_action import inject_plugin_panel
+    results = []
+    for count in frame_counts:
+        # Keep no Python references to the frames: KiCad creates its frames in C++, so the
+        # plugin only ever sees the temporary proxies `wx.GetTopLevelWindows()` returns
+        for index in range(count):
+            wx.Frame(None, title=f"synthetic_{index} — Schematic Editor").SetSizer(wx.BoxSizer(wx.VERTICAL))
+            wx.Frame(None, title=f"synthetic_{index} — PCB Editor")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            results.append(measure("inject_plugin_panel", {"frames": count, "state": "new"}, lambda _: inject_plugin_panel(), 1))
+            results.append(measure("inject_plugin_panel", {"frames": count, "state": "covered"}, lambda _: inject_plugin_panel(), repeat))
+        for frame in wx.GetTopLevelWindows():
+            if frame.GetTitle().startswith("synthetic_"):
+                frame.Destroy()
+    app.Destroy()
+    return results
+
+## @brief Compares results with a baseline file and lists regressions.
+#  @return The list of `(name, params, baseline, current, ratio)` beyond `threshold`.
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, 'r') as file:
+        baseline = json.load(file)
+    previous = {(entry["name"], json.dumps(entry["params"], sort_keys=True)): entry
+                for entry in baseline.get("results", []) if "median" in entry}
+
+    regressions = []
+    print("")
+    print(f"Comparison with {baseline_path}:")
+    for entry in results:
+        key = (entry["name"], json.dumps(entry["params"], sort_keys=True))
+        if "median" not in entry or key not in previous:
+            continue
+        before = previous[key]["median"]
+        ratio = entry["median"] / before if before else float("inf")
+        mark = "❗" if ratio > 1 + threshold else "  "
+        print(f"{mark} {entry['name']:<28} {key[1]:<40} {before * 1000:9.2f} → {entry['median'] * 1000:9.2f} ms ({ratio:5.2f}x)")
+        if ratio > 1 + threshold:
+            regressions.append((entry["name"], entry["params"], before, entry["median"], ratio))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline EasyEDA2KiCAD plugin benchmarks.")
+    parser.add_argument("--sizes", default="100,1000,5000", help="comma-separated entry/symbol counts")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated converter latency in seconds")
+    parser.add_argument("--symbol-size", type=int, default=2000, help="approximate bytes per symbol")
+    parser.add_argument("--batch", type=int, default=20, help="parts per batch import")
+    parser.add_argument("--frames", default="1,10,50", help="comma-separated schematic frame counts for injection")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before reporting a regression")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    sandbox = tempfile.mkdtemp(prefix="easyeda2kicad-bench-")
+    enter_sandbox(sandbox)
+    converter = write_fake_converter(sandbox)
+
+    results = []
+    try:
+        for size in sizes:
+            print(f"Size {size}:")
+            results += bench_configure(sandbox, size, args.repeat)
+            results += bench_deconfigure(sandbox, size, args.repeat)
+            results += bench_import(sandbox, converter, size, args.repeat, args.latency, args.symbol_size, args.batch)
+            results += bench_search(size, args.repeat)
+        print("Injection:")
+        results += bench_inject([int(count) for count in args.frames.split(",") if count], args.repeat)
+    finally:
+        shutil.rmtree(sandbox, ignore_errors=True)
+
+    report = {
+        "version": RESULTS_VERSION,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": vars(args),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4)
+        print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n❗ {len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold * 100:.0f}%.")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,40 @@
 import wx
 import os
-import subprocess
 import shutil  # For cross-platform command lookup
 import json  # For modifying KiCad config
+import time
+import threading
 
-## @brief Path where KiCad plugin data will be stored.
-KICAD_PATH = os.path.join(os.path.expanduser("~"), "Documents", "KiCAD", "EASYEDA2KICAD")
+# Relative imports work inside KiCad's plugin package, plain ones when run from the repository
+try:
+    from .easyeda2kicad_settings import KICAD_PATH, load_settings
+    from .easyeda2kicad_executor import get_import_executor, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_TIMED_OUT, JOB_CANCELLED
+    from .easyeda2kicad_batch import BatchImport, parse_part_numbers, read_bom_part_numbers, LCSC_ID_PATTERN
+    from .easyeda2kicad_worker import get_converter_pool
+    from .easyeda2kicad_telemetry import IMPORT_LOG_PATH
+    from .easyeda2kicad_proxy import get_proxy_environment
+    from .easyeda2kicad_shards import get_shard_router
+    from .easyeda2kicad_search import get_search_index, complete
+except ImportError:
+    from easyeda2kicad_settings import KICAD_PATH, load_settings
+    from easyeda2kicad_executor import get_import_executor, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_TIMED_OUT, JOB_CANCELLED
+    from easyeda2kicad_batch import BatchImport, parse_part_numbers, read_bom_part_numbers, LCSC_ID_PATTERN
+    from easyeda2kicad_worker import get_converter_pool
+    from easyeda2kicad_telemetry import IMPORT_LOG_PATH
+    from easyeda2kicad_proxy import get_proxy_environment
+    from easyeda2kicad_shards import get_shard_router
+    from easyeda2kicad_search import get_search_index, complete
 
 ## @brief Returns a cleaned environment for subprocess calls.
 #  @details KiCad may propagate PYTHONPATH/PYTHONHOME and force loading system
-#  packages inside pipx/venv commands, causing import conflicts.
-def get_sanitized_subprocess_env():
+#  packages inside pipx/venv commands, causing import conflicts. When the API
+#  proxy is enabled, PYTHONPATH is replaced by the folder of its request hook only.
+#  @param settings Plugin settings, loaded from disk by default.
+def get_sanitized_subprocess_env(settings=None):
     env = os.environ.copy()
     env.pop("PYTHONPATH", None)
     env.pop("PYTHONHOME", None)
+    env.update(get_proxy_environment(settings))
     return env
 
 ## @brief Retrieves the path of the `easyeda2kicad` command using pipx environment or fallback paths.
@@ -35,25 +56,59 @@ def get_easyeda2kicad_path():
 
     return easyeda2kicad_path
 
+## @brief Native handles of the schematic windows that already carry the plugin panel.
+#  @details KiCad creates its frames in C++, so the wxPython objects returned by
+#  `wx.GetTopLevelWindows()` are temporary proxies and cannot be tracked by identity.
+#  Handles are dropped again when their window is destroyed.
+_injected_windows = set()
+
+## @brief Remembers a window as handled until it is destroyed.
+def _mark_injected(window):
+    handle = window.GetHandle()
+    if not handle or handle in _injected_windows:
+        return
+    _injected_windows.add(handle)
+    window_id = window.GetId()
+
+    def forget(event):
+        event.Skip()
+        # Destroy events of child windows propagate up to the frame as well
+        if event.GetId() == window_id:
+            _injected_windows.discard(handle)
+    window.Bind(wx.EVT_WINDOW_DESTROY, forget)
+
+## @brief Tells whether a top-level window title belongs to a schematic editor.
+def is_schematic_title(title):
+    # Skip PCB windows; apply only for schematic windows
+    if "PCB" in title:
+        return False
+    return ("Schematic" in title) or ("Eeschema" in title) or ("schematic" in title)
+
 ## @brief Injects the EasyEDA2KiCAD plugin panel into the KiCad UI.
-def inject_plugin_panel():
-    for window in wx.GetTopLevelWindows():
+#  @param windows Top-level windows to inspect, defaults to `wx.GetTopLevelWindows()`.
+#  @return The number of windows that received a panel during this call.
+def inject_plugin_panel(windows=None):
+    injected = 0
+    for window in (wx.GetTopLevelWindows() if windows is None else windows):
+        # Windows handled before need neither a title lookup nor a child search
+        if window.GetHandle() in _injected_windows:
+            continue
+
         try:
             title = window.GetTitle()
         except Exception:
             continue
-        
-        # Skip PCB windows; apply only for schematic windows
-        if "PCB" in title:
-            continue
 
-        if ("Schematic" in title) or ("Eeschema" in title) or ("schematic" in title):
+        if is_schematic_title(title):
             # Prevent duplicate panel injection
             if window.FindWindowByName("EasyEDA2KiCADPanel"):
+                _mark_injected(window)
                 continue
 
             plugin_panel = EasyEDA2KiCADPanel(window)
             plugin_panel.SetName("EasyEDA2KiCADPanel")  # Assign unique name for tracking
+            _mark_injected(window)
+            injected += 1
 
             # Attach the panel to the KiCad UI
             if window.GetSizer() is not None:
@@ -61,6 +116,7 @@ def inject_plugin_panel():
                 window.Layout()
                 window.Refresh()
                 print("Injected plugin panel into window:", title)
+    return injected
 
 ## @brief Custom panel for EasyEDA2KiCAD plugin within KiCad.
 class EasyEDA2KiCADPanel(wx.Panel):
@@ -72,28 +128,181 @@ class EasyEDA2KiCADPanel(wx.Panel):
         
         # Textbox for entering LCSC part numbers
         self.text_box = wx.TextCtrl(self, style=wx.TE_PROCESS_ENTER)
-        self.text_box.SetHint("Enter LCSC Part Number...")
+        self.text_box.SetHint("Enter LCSC Part Number(s)...")
+        self.text_box.Bind(wx.EVT_TEXT_ENTER, self.on_import)
+        self.text_box.Bind(wx.EVT_TEXT, self.on_text)
+        self.text_box.Bind(wx.EVT_SET_FOCUS, self.on_text_focus)
+
+        # Autocompletion from the parts already in the library; the index is built on first focus
+        self.completer = PartCompleter(get_search_index())
+        self.text_box.AutoComplete(self.completer)
 
         # Import button to start the EasyEDA2KiCAD process
         self.run_button = wx.Button(self, label="Import")
         self.run_button.Bind(wx.EVT_BUTTON, self.on_import)
 
+        # BOM button to import every part listed in a JLC/LCSC BOM file
+        self.bom_button = wx.Button(self, label="BOM...")
+        self.bom_button.Bind(wx.EVT_BUTTON, self.on_import_bom)
+
+        # Checkbox forcing a fresh download of parts that are already in the library
+        self.refresh_checkbox = wx.CheckBox(self, label="Refresh")
+        self.refresh_checkbox.SetToolTip("Re-import parts even if they are already in the library")
+
+        # Cancel button to stop queued and running imports
+        self.cancel_button = wx.Button(self, label="Cancel")
+        self.cancel_button.Bind(wx.EVT_BUTTON, self.on_cancel)
+        self.cancel_button.Disable()
+
+        # Status line showing the progress of background imports
+        self.status_text = wx.StaticText(self, label="")
+
         # Add UI elements to the panel layout
         sizer.Add(self.text_box, 1, wx.EXPAND | wx.ALL, 5)
         sizer.Add(self.run_button, 0, wx.ALL, 5)
+        sizer.Add(self.bom_button, 0, wx.ALL, 5)
+        sizer.Add(self.refresh_checkbox, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
+        sizer.Add(self.cancel_button, 0, wx.ALL, 5)
+        sizer.Add(self.status_text, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
         self.SetSizer(sizer)
 
+        self.settings = load_settings()
+        self.batches = []
+
     ## @brief Handles the import button click event.
+    #  @details The import runs on the shared `ImportExecutor`, so the schematic
+    #  editor stays responsive while the part is downloaded and converted.
     #  @param event The button click event.
     def on_import(self, event):
-        part_number = self.text_box.GetValue().strip()
-        if not part_number:
+        text = self.text_box.GetValue().strip()
+        if not text:
             wx.MessageBox("Please enter a valid LCSC part number.", "Error", wx.ICON_ERROR)
             return
 
-        # Verify `easyeda2kicad` command availability
+        # Several comma- or newline-separated IDs are imported as a batch
+        part_numbers, invalid = parse_part_numbers(text)
+        if len(part_numbers) > 1:
+            if invalid:
+                wx.MessageBox(f"Ignoring invalid part numbers: {', '.join(invalid)}", "Warning", wx.ICON_WARNING)
+            self.start_import(part_numbers)
+            return
+
+        # A single part is queued on the shared executor next to the other panels' imports
+        part_number = part_numbers[0] if part_numbers else text
+        self.start_import([part_number], executor=get_import_executor(self.settings["import_workers"]))
+
+    ## @brief Builds the search index in the background, or picks up outside library changes.
+    #  @param event The focus event.
+    def on_text_focus(self, event):
+        event.Skip()
+        self.completer.index.refresh_async()
+
+    ## @brief Turns a picked completion into its LCSC ID and flags parts already in the library.
+    #  @param event The text change event.
+    def on_text(self, event):
+        event.Skip()
+        value = self.text_box.GetValue()
+        replacement = self.completer.replacement(value)
+        if replacement is not None and replacement != value:
+            # Changing the text from within the completion popup's own event is not safe
+            wx.CallAfter(self.apply_completion, replacement)
+            return
+        self.show_library_hint(value)
+
+    ## @brief Replaces the text of the part number box with a picked completion.
+    #  @param text The new text.
+    def apply_completion(self, text):
+        if not self:
+            return
+        self.text_box.ChangeValue(text)
+        self.text_box.SetInsertionPointEnd()
+        self.show_library_hint(text)
+
+    ## @brief Shows in the status line when the last typed part number is already imported.
+    #  @param text Current text of the part number box.
+    def show_library_hint(self, text):
+        # The status line belongs to the running imports
+        if self.batches:
+            return
+        tokens = text.replace(",", " ").replace(";", " ").split()
+        record = None
+        if tokens and LCSC_ID_PATTERN.fullmatch(tokens[-1]):
+            record = self.completer.index.find_part(tokens[-1])
+        label = f"{tokens[-1].upper()} is already in {record['library']}" if record is not None else ""
+        if self.status_text.GetLabel() != label:
+            self.status_text.SetLabel(label)
+            self.Layout()
+
+    ## @brief Asks for a BOM CSV file and imports every LCSC part listed in it.
+    #  @param event The button click event.
+    def on_import_bom(self, event):
+        with wx.FileDialog(
+            self, "Select JLC/LCSC BOM", wildcard="CSV files (*.csv)|*.csv|All files (*.*)|*.*",
+            style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST
+        ) as dialog:
+            if dialog.ShowModal() != wx.ID_OK:
+                return
+            path = dialog.GetPath()
+
+        try:
+            part_numbers = read_bom_part_numbers(path)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            wx.MessageBox(f"Could not read BOM file:\n{str(e)}", "Error", wx.ICON_ERROR)
+            return
+
+        if not part_numbers:
+            wx.MessageBox("No LCSC part numbers found in the BOM file.", "Error", wx.ICON_ERROR)
+            return
+        self.start_import(part_numbers)
+
+    ## @brief Starts importing parts in the background.
+    #  @details Every part is converted into its own staging directory and then
+    #  spliced into the shared library, so concurrent imports never race on it.
+    #  @param part_numbers LCSC part numbers to import.
+    #  @param executor Shared executor to queue on; batches get their own pool by default.
+    def start_import(self, part_numbers, executor=None):
+        resolve_started = time.perf_counter()
+        easyeda2kicad_path = self.find_easyeda2kicad()
+        if easyeda2kicad_path is None:
+            return
+        resolve_time = time.perf_counter() - resolve_started
+
+        output_base = os.path.join(KICAD_PATH, "easyeda2kicad")
+        shard_router = self.get_shard_router(output_base)
+
+        batch = BatchImport(
+            part_numbers,
+            easyeda2kicad_path,
+            output_base,
+            env=get_sanitized_subprocess_env(self.settings),
+            workers=self.settings["batch_workers"],
+            timeout=self.settings["import_timeout"],
+            on_progress=self.on_import_progress,
+            on_done=self.on_import_done,
+            dispatch=wx.CallAfter,
+            warm_pool=self.get_warm_pool(easyeda2kicad_path),
+            executor=executor,
+            cache_ttl=self.get_cache_ttl(),
+            force=self.refresh_checkbox.GetValue(),
+            log_path=IMPORT_LOG_PATH if self.settings["telemetry"] else None,
+            resolve_time=resolve_time,
+            dedup_models=self.settings["dedup_models"],
+            shard_router=shard_router
+        )
+        try:
+            self.batches.append(batch.start())
+        except Exception as e:
+            wx.MessageBox(f"Unexpected error: {str(e)}", "Error", wx.ICON_ERROR)
+            return
+
+        self.text_box.Clear()
+        self.on_import_progress(batch)
+
+    ## @brief Resolves the `easyeda2kicad` executable, reporting a missing command to the user.
+    #  @return The executable path, or None if it could not be found.
+    def find_easyeda2kicad(self):
         try:
-            easyeda2kicad_path = get_easyeda2kicad_path()
+            return get_easyeda2kicad_path()
         except FileNotFoundError:
             wx.MessageBox(
                 "❗ Error: 'easyeda2kicad' command not found.\n"
@@ -101,36 +310,223 @@ class EasyEDA2KiCADPanel(wx.Panel):
                 "Error",
                 wx.ICON_ERROR
             )
-            return
+            return None
 
-        # Construct command for importing parts
-        command_symbol = [
-            easyeda2kicad_path, "--overwrite", "--full",
-            f"--lcsc_id={part_number}", "--output", os.path.join(KICAD_PATH, "easyeda2kicad")
-        ]
+    ## @brief Returns the warm converter pool for imports, or None when it is disabled.
+    #  @param easyeda2kicad_path Path of the `easyeda2kicad` executable.
+    def get_warm_pool(self, easyeda2kicad_path):
+        if not self.settings["warm_worker"]:
+            return None
+        return get_converter_pool(
+            easyeda2kicad_path,
+            env=get_sanitized_subprocess_env(self.settings),
+            idle_timeout=self.settings["worker_idle_timeout"]
+        )
 
-        # Execute the import command
+    ## @brief Returns the shard router for imports, or None when sharding is off.
+    #  @details Makes sure every shard library exists and is registered in KiCad first.
+    #  @param output_base Output base path of the main library.
+    def get_shard_router(self, output_base):
         try:
-            result_symbol = subprocess.run(
-                command_symbol,
-                capture_output=True,
-                text=True,
-                env=get_sanitized_subprocess_env()
+            router = get_shard_router(output_base, self.settings)
+            if router is not None and router.ensure_registered():
+                wx.MessageBox(
+                    "EasyEDA2KiCAD shard libraries were added to the library tables.\n"
+                    "Restart KiCad to see the parts imported into them.",
+                    "Info",
+                    wx.ICON_INFORMATION
+                )
+        except (OSError, ValueError) as e:
+            wx.MessageBox(f"Could not set up the shard libraries, importing into the main library:\n{str(e)}", "Warning", wx.ICON_WARNING)
+            return None
+        return router
+
+    ## @brief Returns the manifest freshness limit in seconds, None if entries never expire.
+    def get_cache_ttl(self):
+        days = self.settings["cache_ttl_days"]
+        return None if days is None else float(days) * 24 * 3600
+
+    ## @brief Cancels every import started from this panel.
+    #  @param event The button click event.
+    def on_cancel(self, event):
+        for batch in self.batches:
+            batch.cancel()
+
+    ## @brief Updates the status line; called on the GUI thread via `wx.CallAfter`.
+    #  @param batch The batch whose state changed.
+    def on_import_progress(self, batch):
+        # The panel may have been destroyed together with its schematic window
+        if not self:
+            return
+
+        jobs = [job for pending in self.batches for job in pending.jobs]
+        queued = sum(1 for job in jobs if job.state == JOB_QUEUED)
+        running = [job.part_number for job in jobs if job.state == JOB_RUNNING]
+
+        if running:
+            label = f"Importing {', '.join(running[:3])}{'...' if len(running) > 3 else ''}"
+            if queued:
+                label += f" ({queued} queued)"
+        elif queued:
+            label = f"{queued} queued"
+        elif self.batches:
+            label = "Updating library..."
+        else:
+            label = ""
+        self.status_text.SetLabel(label)
+        self.cancel_button.Enable(bool(self.batches))
+        self.Layout()
+
+    ## @brief Reports the outcome of a finished import; called on the GUI thread.
+    #  @param batch The finished batch.
+    def on_import_done(self, batch):
+        if not self:
+            return
+
+        self.batches = [pending for pending in self.batches if pending is not batch]
+        self.on_import_progress(batch)
+
+        # Keep the search index in step with the library without rescanning it
+        index = self.completer.index
+        for library_base in set(batch.merged) | set(batch.removed):
+            index.update(library_base + ".kicad_sym", batch.merged.get(library_base), batch.removed.get(library_base, ()))
+
+        if len(batch.part_numbers) == 1:
+            self.report_single_import(batch)
+            return
+
+        failed = any(not result.success for result in batch.ordered_results())
+        wx.MessageBox(batch.report(), "Batch Import", wx.ICON_WARNING if failed else wx.ICON_INFORMATION)
+
+    ## @brief Shows the outcome of a single-part import.
+    #  @param batch The finished single-part batch.
+    def report_single_import(self, batch):
+        result = batch.ordered_results()[0] if batch.ordered_results() else None
+        if result is not None and result.cached:
+            wx.MessageBox(
+                f"Part {result.part_number} is already imported to EasyEDA2KiCAD.\n"
+                "Tick \"Refresh\" to download it again.",
+                "Already Imported",
+                wx.ICON_INFORMATION
             )
-            if result_symbol.returncode != 0:
-                wx.MessageBox(f"Failed to import symbol:\n{result_symbol.stderr}", "Import Error", wx.ICON_ERROR)
-                return
+            return
 
-            wx.MessageBox(f"Part {part_number} imported successfully to EasyEDA2KiCAD!", "Success", wx.ICON_INFORMATION)
-        except Exception as e:
-            wx.MessageBox(f"Unexpected error: {str(e)}", "Error", wx.ICON_ERROR)
+        if not batch.jobs:
+            # The batch failed before the conversion could be queued
+            message = result.message if result is not None else "unknown error"
+            wx.MessageBox(f"Failed to import symbol:\n{message}", "Import Error", wx.ICON_ERROR)
+            return
+
+        job = batch.jobs[0]
+        if result is not None and result.success:
+            wx.MessageBox(f"Part {job.part_number} imported successfully to EasyEDA2KiCAD!", "Success", wx.ICON_INFORMATION)
+        elif job.state == JOB_CANCELLED:
+            self.status_text.SetLabel(f"Import of {job.part_number} cancelled")
+        elif job.state == JOB_TIMED_OUT:
+            wx.MessageBox(f"Import of {job.part_number} timed out after {job.timeout} seconds.", "Import Error", wx.ICON_ERROR)
+        elif job.error is not None:
+            wx.MessageBox(f"Unexpected error: {str(job.error)}", "Error", wx.ICON_ERROR)
+        elif job.state != JOB_SUCCEEDED:
+            wx.MessageBox(f"Failed to import symbol:\n{job.stderr}", "Import Error", wx.ICON_ERROR)
+        else:
+            message = result.message if result is not None else "unknown error"
+            wx.MessageBox(f"Failed to import symbol:\n{message}", "Import Error", wx.ICON_ERROR)
+
+## @brief Autocompletion of the part number box from the library search index.
+#  @details Called for every keystroke, on the GUI thread or, on MSW, on a worker thread
+#  of the native completion, so it only does the index lookup and keeps the remembered
+#  replacements behind a lock; while the index is still being built it offers nothing.
+class PartCompleter(wx.TextCompleterSimple):
+    ## @brief Number of remembered completions after which they are all forgotten.
+    MAX_REPLACEMENTS = 1000
+
+    ## @brief Creates the completer.
+    #  @param index The `SearchIndex` to look up.
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+        # Completion text -> box text with the bare LCSC ID; kept across calls, as the popup
+        # may ask for new completions of a picked entry before the panel sees its text
+        self._replacements = {}
+        self._lock = threading.Lock()
 
-## @brief Timer-based plugin injector that periodically checks for active KiCad windows.
+    ## @brief Returns the completions of the text typed so far.
+    #  @param prefix Current text of the part number box.
+    def GetCompletions(self, prefix):
+        if not self.index.ready:
+            # Safe from any thread: the build itself runs on its own thread
+            self.index.refresh_async()
+            return []
+        entries = complete(self.index, prefix)
+        with self._lock:
+            if len(self._replacements) > self.MAX_REPLACEMENTS:
+                self._replacements.clear()
+            self._replacements.update(entries)
+        return [completion for completion, replacement in entries]
+
+    ## @brief Returns the box text a picked completion stands for, or None.
+    #  @param text Current text of the part number box.
+    def replacement(self, text):
+        with self._lock:
+            return self._replacements.get(text)
+
+## @brief Event-driven plugin injector for KiCad schematic windows.
+#  @details Window activation and top-level window creation trigger an injection
+#  pass right away. The timer is only a fallback for frames whose events are not
+#  seen by the application: it starts at `MIN_INTERVAL` and doubles up to
+#  `MAX_INTERVAL` every time a pass finds nothing new, so an idle KiCad costs
+#  almost no wake-ups.
 class PluginInjector(wx.Timer):
+    ## @brief Fallback polling interval right after start-up or a window event (ms).
+    MIN_INTERVAL = 500
+    ## @brief Upper bound of the fallback polling interval (ms).
+    MAX_INTERVAL = 60000
+
     ## @brief Initializes the plugin injector timer.
     def __init__(self):
         super().__init__()
+        self.interval = self.MIN_INTERVAL
+        self._scan_pending = False
+
+    ## @brief Subscribes to window events and schedules the first injection pass.
+    def start(self):
+        app = wx.GetApp()
+        if app is not None:
+            # Events a frame does not consume are passed on to the application object
+            app.Bind(wx.EVT_ACTIVATE, self.on_window_event)
+            app.Bind(wx.EVT_WINDOW_CREATE, self.on_window_event)
+        self.request_scan()
+
+    ## @brief Schedules an injection pass after a window was activated or created.
+    #  @param event The activation or creation event.
+    def on_window_event(self, event):
+        event.Skip()
+        if event.GetEventType() == wx.wxEVT_CREATE:
+            # Child controls are created all the time; only new frames are interesting
+            window = event.GetWindow()
+            if window is None or not window.IsTopLevel():
+                return
+        elif not event.GetActive():
+            return
+        self.request_scan()
+
+    ## @brief Runs an injection pass on the next idle cycle and resets the back-off.
+    def request_scan(self):
+        self.interval = self.MIN_INTERVAL
+        if not self._scan_pending:
+            self._scan_pending = True
+            # New frames get their title after creation, so look once the event loop is idle
+            wx.CallAfter(self.scan)
+
+    ## @brief Injects missing panels and re-arms the fallback timer.
+    def scan(self):
+        self._scan_pending = False
+        if inject_plugin_panel():
+            self.interval = self.MIN_INTERVAL
+        else:
+            self.interval = min(self.interval * 2, self.MAX_INTERVAL)
+        self.StartOnce(self.interval)
 
     ## @brief Invokes the panel injection logic upon timer notification.
     def Notify(self):
-        inject_plugin_panel()
+        self.scan()
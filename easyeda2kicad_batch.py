@@ -0,0 +1,471 @@
+import os
+import re
+import sys
+import csv
+import shutil
+import tempfile
+import time
+import uuid
+import argparse
+import threading
+
+try:
+    from .easyeda2kicad_settings import KICAD_PATH, load_settings
+    from .easyeda2kicad_executor import ImportExecutor, ImportJob, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED, JOB_TIMED_OUT
+    from .easyeda2kicad_symlib import SymbolLibrary, read_symbols, merge_symbols
+    from .easyeda2kicad_manifest import ImportManifest
+    from .easyeda2kicad_modelstore import ModelStore
+    from .easyeda2kicad_shards import retarget_footprints
+    from .easyeda2kicad_telemetry import snapshot_libraries, diff_libraries, build_record, build_batch_record, append_records
+except ImportError:
+    from easyeda2kicad_settings import KICAD_PATH, load_settings
+    from easyeda2kicad_executor import ImportExecutor, ImportJob, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED, JOB_TIMED_OUT
+    from easyeda2kicad_symlib import SymbolLibrary, read_symbols, merge_symbols
+    from easyeda2kicad_manifest import ImportManifest
+    from easyeda2kicad_modelstore import ModelStore
+    from easyeda2kicad_shards import retarget_footprints
+    from easyeda2kicad_telemetry import snapshot_libraries, diff_libraries, build_record, build_batch_record, append_records
+
+## @brief Pattern of a single LCSC part number, e.g. `C7472`.
+LCSC_ID_PATTERN = re.compile(r"\bC\d+\b", re.IGNORECASE)
+
+## @brief Words (lowercase) whose presence in a BOM column header marks a column of LCSC part numbers,
+#  e.g. `LCSC`, `LCSC Part #`, `LCSC#` or `JLCPCB Part`.
+BOM_ID_KEYWORDS = ("lcsc", "jlcpcb part", "jlc part", "supplier part")
+
+## @brief BOM column headers that are never read, as designators like `C1` look like LCSC IDs.
+BOM_EXCLUDED_HEADER = re.compile(r"designator|reference|\bref\b", re.IGNORECASE)
+
+## @brief Builds the `easyeda2kicad` command line for a single part.
+#  @param easyeda2kicad_path Path of the `easyeda2kicad` executable.
+#  @param part_number LCSC part number to import.
+#  @param output Output base path, without the library extensions.
+#  @return The argument list for `subprocess`.
+def build_import_command(easyeda2kicad_path, part_number, output):
+    return [
+        easyeda2kicad_path, "--overwrite", "--full",
+        f"--lcsc_id={part_number}", "--output", output
+    ]
+
+## @brief Splits free text into LCSC part numbers.
+#  @param text Part numbers separated by commas, semicolons, whitespace or newlines.
+#  @return A tuple `(part_numbers, invalid_tokens)`; part numbers are upper-cased and deduplicated.
+def parse_part_numbers(text):
+    part_numbers = []
+    invalid = []
+    for token in re.split(r"[,;\s]+", text):
+        if not token:
+            continue
+        if LCSC_ID_PATTERN.fullmatch(token):
+            token = token.upper()
+            if token not in part_numbers:
+                part_numbers.append(token)
+        else:
+            invalid.append(token)
+    return part_numbers, invalid
+
+## @brief Reads the LCSC part numbers from a JLC/LCSC BOM CSV file.
+#  @details The part number columns are found by header name. Other columns, and
+#  designator columns in particular, are never searched: capacitor designators such as
+#  `C1` would otherwise be imported as LCSC parts.
+#  @param path Path of the BOM file.
+#  @return The deduplicated list of part numbers in BOM order.
+#  @exception ValueError No column header names LCSC part numbers.
+def read_bom_part_numbers(path):
+    with open(path, 'r', newline='', encoding='utf-8-sig') as file:
+        sample = file.read(4096)
+        file.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        rows = list(csv.reader(file, dialect))
+
+    if not rows:
+        return []
+
+    header = [cell.strip().lower() for cell in rows[0]]
+    columns = [index for index, name in enumerate(header)
+               if any(keyword in name for keyword in BOM_ID_KEYWORDS)
+               and not BOM_EXCLUDED_HEADER.search(name)]
+    if not columns:
+        raise ValueError("No LCSC part number column found in the BOM. "
+                         "Name the column \"LCSC Part #\" (or \"JLCPCB Part #\") and try again.")
+    cells = [row[index] for row in rows[1:] for index in columns if index < len(row)]
+
+    part_numbers = []
+    for cell in cells:
+        for match in LCSC_ID_PATTERN.findall(cell):
+            match = match.upper()
+            if match not in part_numbers:
+                part_numbers.append(match)
+    return part_numbers
+
+## @brief Moves the outputs of one staged import into the shared library folders.
+#  @param staging_base Output base path the staged import wrote to.
+#  @param output_base Output base path of the shared library.
+#  @param dedup_models Store identical 3D models once, see `ModelStore`.
+#  @param library_base Output base path of the shard library receiving the footprints,
+#  defaults to `output_base`; 3D models always go to the main library's store.
+#  @return A tuple `(symbols, footprints, models)`: the symbol blocks keyed by name and
+#  the file names moved into the `.pretty` and `.3dshapes` folders.
+def collect_staged_output(staging_base, output_base, dedup_models=True, library_base=None):
+    library_base = library_base or output_base
+    symbol_path = staging_base + ".kicad_sym"
+    if not os.path.exists(symbol_path):
+        raise FileNotFoundError("easyeda2kicad did not produce a symbol library.")
+    symbols = read_symbols(symbol_path)
+    if library_base != output_base:
+        symbols = retarget_footprints(symbols, os.path.basename(staging_base), os.path.basename(library_base))
+
+    # 3D models first, so footprints never point at a model that is not there yet
+    staged_models = staging_base + ".3dshapes"
+    models = []
+    if os.path.isdir(staged_models):
+        os.makedirs(output_base + ".3dshapes", exist_ok=True)
+        store = ModelStore(output_base + ".3dshapes")
+        models = os.listdir(staged_models)
+        for name in models:
+            if dedup_models:
+                store.add(os.path.join(staged_models, name), name)
+            else:
+                os.replace(os.path.join(staged_models, name), os.path.join(output_base + ".3dshapes", name))
+
+    # Footprints reference their 3D models by absolute path, so point them at the shared folder
+    staged_footprints = staging_base + ".pretty"
+    footprints = []
+    if os.path.isdir(staged_footprints):
+        os.makedirs(library_base + ".pretty", exist_ok=True)
+        replacements = [(staged_models, output_base + ".3dshapes")]
+        if os.sep != "/":
+            replacements.append((staged_models.replace(os.sep, "/"), (output_base + ".3dshapes").replace(os.sep, "/")))
+        footprints = os.listdir(staged_footprints)
+        for name in footprints:
+            with open(os.path.join(staged_footprints, name), 'r', encoding='utf-8') as file:
+                content = file.read()
+            for old, new in replacements:
+                content = content.replace(old, new)
+            with open(os.path.join(library_base + ".pretty", name), 'w', encoding='utf-8') as file:
+                file.write(content)
+
+    return symbols, footprints, models
+
+## @brief Outcome of a single part within a batch import.
+class BatchResult:
+    def __init__(self, part_number, success, message="", details="", cached=False):
+        self.part_number = part_number
+        self.success = success
+        # True when the part was answered from the import manifest without converting
+        self.cached = cached
+        # One-line summary for the batch report, and the full `easyeda2kicad` error output
+        self.message = message
+        self.details = details
+
+## @brief Imports many parts concurrently and merges them into the shared library.
+#  @details Every part is converted by its own `easyeda2kicad` process writing into a
+#  private staging directory, so concurrent processes never race on the shared
+#  `.kicad_sym`. Once all processes have finished, the staged outputs are merged
+#  into the shared `.kicad_sym`, `.pretty` and `.3dshapes` in a single pass.
+class BatchImport:
+    ## @brief Creates the batch.
+    #  @param part_numbers LCSC part numbers to import.
+    #  @param easyeda2kicad_path Path of the `easyeda2kicad` executable.
+    #  @param output_base Output base path of the shared library, e.g. `KICAD_PATH/easyeda2kicad`.
+    #  @param env Environment for the child processes.
+    #  @param workers Number of concurrent `easyeda2kicad` processes.
+    #  @param timeout Per-part timeout in seconds.
+    #  @param on_progress Called as `on_progress(batch)` whenever a part changes state.
+    #  @param on_done Called as `on_done(batch)` after the merge.
+    #  @param dispatch Callable used to deliver callbacks, e.g. `wx.CallAfter`.
+    #  @param warm_pool Optional `WarmConverterPool` running the conversions.
+    #  @param executor Optional shared `ImportExecutor`; by default the batch runs its own pool of `workers`.
+    #  @param cache_ttl Seconds a manifest entry stays fresh; None never expires, 0 disables the cache.
+    #  @param force Re-import every part even if the manifest says it is present and fresh.
+    #  @param log_path JSONL file receiving one telemetry record per part, None to disable.
+    #  @param resolve_time Seconds spent resolving the `easyeda2kicad` executable.
+    #  @param dedup_models Store identical 3D models once, see `ModelStore`.
+    #  @param shard_router Optional `ShardRouter` spreading the parts over shard libraries.
+    def __init__(self, part_numbers, easyeda2kicad_path, output_base, env=None, workers=4, timeout=None,
+                 on_progress=None, on_done=None, dispatch=None, warm_pool=None, executor=None,
+                 cache_ttl=None, force=False, log_path=None, resolve_time=0.0, dedup_models=True,
+                 shard_router=None):
+        self.part_numbers = list(part_numbers)
+        self.easyeda2kicad_path = easyeda2kicad_path
+        self.output_base = output_base
+        self.env = env
+        self.timeout = timeout
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self._dispatch = dispatch
+        self.warm_pool = warm_pool
+        self.cache_ttl = cache_ttl
+        self.force = force
+        self.manifest = ImportManifest(output_base)
+        self.log_path = log_path
+        self.resolve_time = resolve_time
+        self.dedup_models = dedup_models
+        self.shard_router = shard_router
+
+        self.batch_id = uuid.uuid4().hex
+        self.results = {}
+        self.jobs = []
+        self.completed = 0
+        # Symbols written to (`merged`) and removed from (`removed`) each library, by output base
+        self.merged = {}
+        self.removed = {}
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._cancelled = False
+        self._owns_executor = executor is None
+        self._executor = executor or ImportExecutor(max_workers=min(max(1, int(workers)), max(1, len(self.part_numbers))))
+        self._staging_root = None
+
+    ## @brief Starts the batch in the background.
+    #  @details Checking the manifest touches the library index of every cached part,
+    #  so it runs on a helper thread together with queueing the conversions; the
+    #  caller, usually the GUI thread, only creates the staging directory.
+    def start(self):
+        staging_parent = os.path.join(os.path.dirname(self.output_base), ".staging")
+        os.makedirs(staging_parent, exist_ok=True)
+        self._staging_root = tempfile.mkdtemp(prefix="batch-", dir=staging_parent)
+        threading.Thread(target=self._prepare, name="easyeda2kicad-batch", daemon=True).start()
+        return self
+
+    ## @brief Cancels every part that has not finished converting yet.
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            jobs = list(self.jobs)
+        for job in jobs:
+            job.cancel()
+
+    ## @brief Blocks until the batch has been merged.
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+    ## @brief Returns the results in the order the parts were requested.
+    def ordered_results(self):
+        return [self.results[part] for part in self.part_numbers if part in self.results]
+
+    ## @brief Builds a human-readable per-part report.
+    def report(self):
+        succeeded = [result for result in self.ordered_results() if result.success]
+        lines = [f"{len(succeeded)} of {len(self.part_numbers)} parts imported."]
+        for result in self.ordered_results():
+            mark = "✅" if result.success else "❗"
+            line = f"{mark} {result.part_number}"
+            if result.message:
+                line += f": {result.message}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    ## @brief Answers cached parts from the manifest and queues the others; runs on a helper thread.
+    def _prepare(self):
+        jobs = []
+        try:
+            # Parts already in the library are answered from the manifest without converting
+            to_import = []
+            for part_number in self.part_numbers:
+                if not self.force and self.cache_ttl != 0 and self.manifest.lookup(part_number, self.cache_ttl) is not None:
+                    self.results[part_number] = BatchResult(part_number, True, "already imported", cached=True)
+                else:
+                    to_import.append(part_number)
+
+            for part_number in to_import:
+                staging_base = os.path.join(self._staging_root, part_number, os.path.basename(self.output_base))
+                os.makedirs(os.path.dirname(staging_base))
+                job = ImportJob(
+                    part_number,
+                    build_import_command(self.easyeda2kicad_path, part_number, staging_base),
+                    env=self.env,
+                    timeout=self.timeout,
+                    on_progress=self._on_job_progress,
+                    on_done=self._on_job_done,
+                    warm_pool=self.warm_pool
+                )
+                job.staging_base = staging_base
+                jobs.append(job)
+        except Exception as e:
+            for part_number in self.part_numbers:
+                self.results.setdefault(part_number, BatchResult(part_number, False, str(e)))
+            jobs = []
+
+        with self._lock:
+            # A cancel that arrived while checking the manifest applies to the new jobs too
+            if self._cancelled:
+                for job in jobs:
+                    job.cancel()
+            self.jobs = jobs
+
+        if not jobs:
+            self._finish()
+            return
+        for job in jobs:
+            try:
+                self._executor.submit(job)
+            except RuntimeError as e:
+                # The shared executor was shut down, e.g. while KiCad is closing
+                job.error = e
+                job.state = JOB_FAILED
+                job._finished.set()
+                self._on_job_done(job)
+
+    ## @brief Forwards part state changes; runs on an executor thread.
+    def _on_job_progress(self, job):
+        self._notify(self.on_progress)
+
+    ## @brief Records a finished conversion; runs on an executor thread.
+    def _on_job_done(self, job):
+        if job.state != JOB_SUCCEEDED:
+            if job.state == JOB_CANCELLED:
+                message = "cancelled"
+            elif job.state == JOB_TIMED_OUT:
+                message = f"timed out after {job.timeout} seconds"
+            elif job.error is not None:
+                message = str(job.error)
+            else:
+                lines = (job.stderr or "").strip().splitlines()
+                message = lines[-1] if lines else f"exit code {job.returncode}"
+            self.results[job.part_number] = BatchResult(job.part_number, False, message, job.stderr or "")
+
+        with self._lock:
+            self.completed += 1
+            last = self.completed == len(self.jobs)
+
+        if last:
+            self._finish()
+
+    ## @brief Merges every successful staged import into the shared library in one pass.
+    def _finish(self):
+        symbols = {}
+        imported = {}
+        libraries = {}
+        merge_started = time.perf_counter()
+        before = snapshot_libraries(self._output_bases()) if self.log_path and self.jobs else None
+        try:
+            for job in self.jobs:
+                if job.state != JOB_SUCCEEDED:
+                    continue
+                try:
+                    library_base = self._library_base(job)
+                    imported[job.part_number] = collect_staged_output(
+                        job.staging_base, self.output_base, self.dedup_models, library_base
+                    )
+                    symbols.setdefault(library_base, {}).update(imported[job.part_number][0])
+                    libraries[job.part_number] = library_base
+                    self.results[job.part_number] = BatchResult(job.part_number, True)
+                except Exception as e:
+                    self.results[job.part_number] = BatchResult(job.part_number, False, str(e))
+
+            try:
+                for library_base, library_symbols in symbols.items():
+                    merge_symbols(library_base + ".kicad_sym", library_symbols)
+                    self.merged[library_base] = library_symbols
+                if self.shard_router is not None:
+                    self.removed[self.output_base] = self._drop_unsharded_copies(symbols)
+            except Exception as e:
+                imported = {}
+                for result in self.results.values():
+                    if result.success and not result.cached:
+                        result.success = False
+                        result.message = f"symbol library update failed: {e}"
+
+            try:
+                self.manifest.record(imported, libraries)
+            except OSError as e:
+                print(f"❗ Could not update the EasyEDA2KiCAD import manifest: {e}")
+
+            if self.log_path:
+                self._log(time.perf_counter() - merge_started, before)
+        finally:
+            shutil.rmtree(self._staging_root, ignore_errors=True)
+            if self._owns_executor:
+                self._executor.shutdown()
+            self._finished.set()
+            self._notify(self.on_done)
+
+    ## @brief Returns the output base of the library a staged part is merged into.
+    def _library_base(self, job):
+        if self.shard_router is None or not os.path.exists(job.staging_base + ".kicad_sym"):
+            return self.output_base
+        shard = self.shard_router.route(job.part_number, read_symbols(job.staging_base + ".kicad_sym"))
+        return self.shard_router.library_base(shard)
+
+    ## @brief Removes re-imported symbols from the main library once they live in a shard.
+    #  @return The names of the removed symbols.
+    def _drop_unsharded_copies(self, symbols):
+        main = SymbolLibrary(self.output_base + ".kicad_sym")
+        names = [name for library_base, library_symbols in symbols.items()
+                 if library_base != self.output_base for name in library_symbols if name in main]
+        main.remove(names)
+        return names
+
+    ## @brief Output base paths of every library the batch may write to: the main library and its shards.
+    def _output_bases(self):
+        if self.shard_router is None:
+            return [self.output_base]
+        return [self.output_base] + self.shard_router.library_bases()
+
+    ## @brief Appends one telemetry record per part and one for the batch's merge to the import log.
+    #  @param merge_time Seconds spent merging the staged outputs.
+    #  @param before Output snapshots of `_output_bases()` taken before the merge.
+    def _log(self, merge_time, before):
+        jobs = {job.part_number: job for job in self.jobs}
+        records = []
+        for part_number in self.part_numbers:
+            phases = {"resolve": self.resolve_time}
+            records.append(build_record(part_number, jobs.get(part_number), self.results.get(part_number), phases, batch_id=self.batch_id))
+        if jobs:
+            outputs = diff_libraries(before, snapshot_libraries(self._output_bases())) if before is not None else {}
+            records.append(build_batch_record(self.batch_id, len(self.part_numbers), len(jobs), merge_time, outputs))
+        try:
+            append_records(records, self.log_path)
+        except OSError as e:
+            print(f"❗ Could not write the EasyEDA2KiCAD import log: {e}")
+
+    ## @brief Delivers a batch callback through the dispatcher.
+    def _notify(self, callback):
+        if callback is None:
+            return
+        if self._dispatch is not None:
+            self._dispatch(callback, self)
+        else:
+            callback(self)
+
+## @brief Command-line entry point: imports parts through the staging and merge path.
+#  @details The installers use this instead of running `easyeda2kicad` on the library
+#  directly: with deduplicated 3D models, the converter would write its models into
+#  the read-only blobs shared by other parts.
+def main(argv=None):
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="Import LCSC parts into the EasyEDA2KiCAD library.")
+    parser.add_argument("part_numbers", nargs="+", help="LCSC part numbers, e.g. C7472")
+    parser.add_argument("--easyeda2kicad", default=shutil.which("easyeda2kicad"), help="path of the easyeda2kicad executable")
+    parser.add_argument("--output", default=os.path.join(KICAD_PATH, "easyeda2kicad"), help="output base path of the library")
+    parser.add_argument("--force", action="store_true", help="re-import parts that are already in the library")
+    args = parser.parse_args(argv)
+
+    if not args.easyeda2kicad:
+        print("❗ Could not find easyeda2kicad executable. Please ensure it is installed via pipx.")
+        return 1
+    part_numbers, invalid = parse_part_numbers(" ".join(args.part_numbers))
+    if invalid:
+        print(f"❗ Invalid part numbers: {', '.join(invalid)}")
+        return 1
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    batch = BatchImport(
+        part_numbers,
+        args.easyeda2kicad,
+        os.path.abspath(args.output),
+        workers=settings["batch_workers"],
+        timeout=settings["import_timeout"],
+        force=args.force,
+        dedup_models=settings["dedup_models"]
+    ).start()
+    batch.wait()
+    print(batch.report())
+    return 0 if all(result.success for result in batch.ordered_results()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,118 +1,164 @@
 import os
 import json
 
-## @brief Retrieves the path to the KiCad configuration file.
-#  @return The path to the KiCad configuration file, or None if not found.
-def get_kicad_config_path():
-    # Check for platform-specific KiCad config paths
-    if os.name == 'nt':  # Windows
-        base_path = os.path.join(os.environ.get('APPDATA', ''), "kicad")
-    else:  # Linux and macOS
-        base_path = os.path.join(os.path.expanduser("~"), ".config", "kicad")
-
-    # Search for versioned KiCad folders (e.g., v7, v8)
-    if base_path and os.path.exists(base_path):
-        versions = [d for d in os.listdir(base_path) if d[0].isdigit() and os.path.isdir(os.path.join(base_path, d))]
-        if versions:
-            latest_version = max(versions, key=lambda v: float(v.split('.')[0]))
-            latest_config_path = os.path.join(base_path, latest_version, "kicad_common.json")
-            if os.path.exists(latest_config_path):
-                return latest_config_path
-
-        # Fallback to checking the standard KiCad path
-        fallback_path = os.path.join(base_path, "kicad_common.json")
-        if os.path.exists(fallback_path):
-            return fallback_path
-
-    # macOS-specific path for KiCad configuration
-    possible_paths = [
-        os.path.join(os.path.expanduser("~"), "Library", "Preferences", "kicad", "kicad_common.json")
-    ]
-
-    for path in possible_paths:
-        if os.path.exists(path):
-            return path
-
-    return None
+try:
+    from .easyeda2kicad_settings import KICAD_PATH
+    from .easyeda2kicad_symlib import atomic_write
+    from .easyeda2kicad_libtable import LibTable, ConfigFingerprints, desired_key, get_kicad_config_dirs
+except ImportError:
+    from easyeda2kicad_settings import KICAD_PATH
+    from easyeda2kicad_symlib import atomic_write
+    from easyeda2kicad_libtable import LibTable, ConfigFingerprints, desired_key, get_kicad_config_dirs
+
+## @brief File kept in every KiCad configuration folder to skip files that did not change.
+FINGERPRINTS_NAME = "easyeda2kicad.fingerprints.json"
+
+## @brief Library entries this plugin registers, keyed by lib table file name.
+LIBRARY_ENTRIES = {
+    "sym-lib-table": {
+        "easyeda2kicad": {
+            "type": "KiCad",
+            "uri": "${EASYEDA2KICAD}/easyeda2kicad.kicad_sym",
+            "options": "",
+            "descr": "EasyEDA2KiCAD Symbol Library",
+        },
+    },
+    "fp-lib-table": {
+        "easyeda2kicad": {
+            "type": "KiCad",
+            "uri": "${EASYEDA2KICAD}/easyeda2kicad.pretty",
+            "options": "",
+            "descr": "EasyEDA2KiCAD Footprint Library",
+        },
+    },
+}
+
+## @brief Human-readable names of the lib tables used in messages.
+TABLE_LABELS = {
+    "sym-lib-table": "Symbol Library",
+    "fp-lib-table": "Footprint Library",
+}
+
+## @brief Retrieves the paths to the KiCad configuration files of all installed versions.
+#  @return A list of `kicad_common.json` paths, oldest version first.
+def get_kicad_config_paths():
+    paths = [os.path.join(directory, "kicad_common.json") for directory in get_kicad_config_dirs()]
+    return [path for path in paths if os.path.exists(path)]
+
+## @brief Sets the `EASYEDA2KICAD` path variable in a `kicad_common.json`.
+#  @return `"unchanged"` (skipped by fingerprint), `"present"`, `"updated"` or `"invalid"`.
+def configure_environment(config_path, kicad_path, fingerprints, desired):
+    if fingerprints.unchanged(config_path, desired):
+        return "unchanged"
+
+    with open(config_path, 'r') as file:
+        try:
+            config_data = json.load(file)
+        except json.JSONDecodeError:
+            return "invalid"
+    if not isinstance(config_data, dict):
+        return "invalid"
+
+    # Add environment variable entries for custom paths
+    environment = config_data.get('environment')
+    if not isinstance(environment, dict):
+        environment = config_data['environment'] = {}
+    env_vars = environment.get('vars')
+    if not isinstance(env_vars, dict):
+        env_vars = environment['vars'] = {}
+
+    status = "present"
+    if env_vars.get('EASYEDA2KICAD') != kicad_path:
+        env_vars['EASYEDA2KICAD'] = kicad_path
+        atomic_write(config_path, json.dumps(config_data, indent=4).encode('utf-8'))
+        status = "updated"
+    fingerprints.remember(config_path, desired)
+    return status
+
+## @brief Adds or updates library entries in a lib table.
+#  @param table_path Path of the `sym-lib-table` or `fp-lib-table`.
+#  @param entries Dictionary of `nickname -> fields`.
+#  @return `"unchanged"`, `"present"`, `"updated"`, `"missing"` or `"invalid"`.
+def configure_lib_table(table_path, entries, fingerprints, desired):
+    if fingerprints.unchanged(table_path, desired):
+        return "unchanged"
+    if not os.path.exists(table_path):
+        # KiCad creates the global tables on first start; creating them here would skip its setup wizard
+        return "missing"
+
+    try:
+        table = LibTable.load(table_path)
+    except (ValueError, UnicodeDecodeError):
+        return "invalid"
+
+    changed = False
+    for name, fields in entries.items():
+        changed = table.set(name, **fields) or changed
+    if changed:
+        table.save(table_path)
+    fingerprints.remember(table_path, desired)
+    return "updated" if changed else "present"
+
+## @brief Configures one KiCad version folder.
+#  @param config_dir KiCad configuration folder, e.g. `~/.config/kicad/9.0`.
+#  @param kicad_path Folder holding the EasyEDA2KiCAD libraries.
+#  @param libraries Library entries per lib table, defaults to `LIBRARY_ENTRIES`.
+#  @return A dictionary of file name to status.
+def configure_profile(config_dir, kicad_path=KICAD_PATH, libraries=None):
+    libraries = LIBRARY_ENTRIES if libraries is None else libraries
+    fingerprints = ConfigFingerprints(os.path.join(config_dir, FINGERPRINTS_NAME))
+    desired = desired_key(kicad_path, libraries)
+
+    results = {"kicad_common.json": configure_environment(
+        os.path.join(config_dir, "kicad_common.json"), kicad_path, fingerprints, desired
+    )}
+    for table_name, entries in libraries.items():
+        results[table_name] = configure_lib_table(os.path.join(config_dir, table_name), entries, fingerprints, desired)
+    fingerprints.save()
+    return results
 
 ## @brief Configures KiCad paths for EasyEDA2KiCad plugin usage.
+#  @details Every installed KiCad version is configured in one pass. Files already in
+#  the desired state are recognised by their fingerprint and not even read, so
+#  reruns are close to free.
 def configure_kicad_paths():
-    ## @brief Defines the custom KiCad path for EasyEDA2KiCad libraries.
-    KICAD_PATH = os.path.join(os.path.expanduser("~"), "Documents", "KiCAD", "EASYEDA2KICAD")
-
     # Create directories for symbols, footprints, and the base path
     os.makedirs(KICAD_PATH, exist_ok=True)
     os.makedirs(os.path.join(KICAD_PATH, "easyeda2kicad.pretty"), exist_ok=True)
     os.makedirs(os.path.join(KICAD_PATH, "easyeda2kicad.3dshapes"), exist_ok=True)
 
-    # Get KiCad configuration path
-    config_path = get_kicad_config_path()
-
-    if config_path:
-        # Load KiCad configuration
-        with open(config_path, 'r') as file:
-            try:
-                config_data = json.load(file)
-            except json.JSONDecodeError:
-                print("❗ KiCad configuration file exists but is corrupted or invalid.")
-                return
-
-        # Add environment variable entries for custom paths
-        if 'environment' not in config_data:
-            config_data['environment'] = {}
-        if 'vars' not in config_data['environment']:
-            config_data['environment']['vars'] = {}
-
-        env_vars = config_data['environment']['vars']
-        if env_vars is None:
-            env_vars = {}
-
-        # Set the EASYEDA2KICAD path in KiCad's environment variables
-        env_vars['EASYEDA2KICAD'] = KICAD_PATH
-        config_data['environment']['vars'] = env_vars
-
-        # Save the modified configuration file
-        with open(config_path, 'w') as file:
-            json.dump(config_data, file, indent=4)
-
-        print("✅ EASYEDA2KICAD path configured successfully.")
-
-        ## @brief Adds the EasyEDA2KiCad symbol library entry to the `sym-lib-table`.
-        sym_lib_table_path = os.path.join(os.path.dirname(config_path), 'sym-lib-table')
-        sym_entry = f'  (lib (name easyeda2kicad)(type KiCad)(uri ${{EASYEDA2KICAD}}/easyeda2kicad.kicad_sym)(options "")(descr "EasyEDA2KiCAD Symbol Library"))'
-
-        if os.path.exists(sym_lib_table_path):
-            with open(sym_lib_table_path, 'r+') as file:
-                content = file.read().strip()
-                if sym_entry not in content:
-                    content = content.rstrip(')') + sym_entry + "\n)"
-                    file.seek(0)
-                    file.write(content)
-                    print("✅ EasyEDA2KiCAD Symbol Library added to sym-lib-table.")
-                else:
-                    print("✅ EasyEDA2KiCAD Symbol Library already exists in sym-lib-table.")
-
-        ## @brief Adds the EasyEDA2KiCad footprint library entry to the `fp-lib-table`.
-        fp_lib_table_path = os.path.join(os.path.dirname(config_path), 'fp-lib-table')
-        fp_entry = f'  (lib (name easyeda2kicad)(type KiCad)(uri ${{EASYEDA2KICAD}}/easyeda2kicad.pretty)(options "")(descr "EasyEDA2KiCAD Footprint Library"))'
-
-        if os.path.exists(fp_lib_table_path):
-            with open(fp_lib_table_path, 'r+') as file:
-                content = file.read().strip()
-                if fp_entry not in content:
-                    content = content.rstrip(')') + fp_entry + "\n)"
-                    file.seek(0)
-                    file.write(content)
-                    print("✅ EasyEDA2KiCAD Footprint Library added to fp-lib-table.")
-                else:
-                    print("✅ EasyEDA2KiCAD Footprint Library already exists in fp-lib-table.")
-
-    else:
+    # Get KiCad configuration paths
+    config_paths = get_kicad_config_paths()
+
+    if not config_paths:
         print("❗ KiCad configuration file not found. Please open KiCad, go to Preferences → Configure Paths, click OK, then rerun this script.")
         print("🔍 If you have already launched KiCad, ensure your config is located in:")
         print("   → Linux: ~/.config/kicad/")
         print("   → macOS: ~/Library/Preferences/kicad/")
         print("   → Windows: %APPDATA%\\kicad\\")
+        return
+
+    for config_path in config_paths:
+        config_dir = os.path.dirname(config_path)
+        print(f"🔧 KiCad configuration in {config_dir}")
+        results = configure_profile(config_dir)
+
+        status = results.pop("kicad_common.json")
+        if status == "invalid":
+            print("❗ KiCad configuration file exists but is corrupted or invalid.")
+        elif status == "updated":
+            print("✅ EASYEDA2KICAD path configured successfully.")
+        else:
+            print("✅ EASYEDA2KICAD path already configured.")
+
+        for table_name, status in results.items():
+            label = TABLE_LABELS.get(table_name, table_name)
+            if status == "updated":
+                print(f"✅ EasyEDA2KiCAD {label} added to {table_name}.")
+            elif status in ("present", "unchanged"):
+                print(f"✅ EasyEDA2KiCAD {label} already exists in {table_name}.")
+            elif status == "invalid":
+                print(f"❗ {table_name} is corrupted or invalid, EasyEDA2KiCAD {label} not added.")
 
 ## @brief Main function to initiate the configuration process.
 if __name__ == "__main__":
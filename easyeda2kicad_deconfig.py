@@ -1,55 +1,71 @@
 import os
 import json
 
-def get_kicad_config_path():
-    if os.name == 'nt':
-        base_path = os.path.join(os.environ.get('APPDATA', ''), "kicad")
-    else:
-        base_path = os.path.join(os.path.expanduser("~"), ".config", "kicad")
+try:
+    from .easyeda2kicad_symlib import atomic_write
+    from .easyeda2kicad_libtable import LibTable, get_kicad_config_dirs
+    from .easyeda2kicad_config import FINGERPRINTS_NAME
+except ImportError:
+    from easyeda2kicad_symlib import atomic_write
+    from easyeda2kicad_libtable import LibTable, get_kicad_config_dirs
+    from easyeda2kicad_config import FINGERPRINTS_NAME
 
-    if base_path and os.path.exists(base_path):
-        versions = [d for d in os.listdir(base_path) if d[0].isdigit() and os.path.isdir(os.path.join(base_path, d))]
-        if versions:
-            return [os.path.join(base_path, v) for v in versions]
+## @brief Tells whether a lib table entry points into the EasyEDA2KiCAD libraries.
+def is_easyeda2kicad_entry(name, fields):
+    uri = (fields or {}).get("uri", "")
+    return (
+        uri.startswith("${EASYEDA2KICAD}")
+        or uri.endswith("easyeda2kicad.kicad_sym")
+        or uri.endswith("easyeda2kicad.pretty")
+    )
 
-    return []
+## @brief Removes the EasyEDA2KiCAD entries of a lib table.
+#  @return The removed library names; the file is only rewritten if this is not empty.
+def remove_lib_table_entries(table_path):
+    if not os.path.exists(table_path):
+        return []
+    try:
+        table = LibTable.load(table_path)
+    except (ValueError, UnicodeDecodeError):
+        print(f"❗ {os.path.basename(table_path)} is corrupted or invalid, skipped.")
+        return []
+    removed = table.remove_where(is_easyeda2kicad_entry)
+    if removed:
+        table.save(table_path)
+    return removed
 
 def remove_easyeda2kicad_entries(config_path):
     # Clean kicad_common.json
     config_file = os.path.join(config_path, "kicad_common.json")
     if os.path.exists(config_file):
-        with open(config_file, 'r') as file:
-            config_data = json.load(file)
-
-        if 'environment' in config_data and 'vars' in config_data['environment']:
-            env_vars = config_data['environment']['vars']            
-            if isinstance(env_vars, dict) and 'EASYEDA2KICAD' in env_vars:
-                del env_vars['EASYEDA2KICAD']
+        try:
+            with open(config_file, 'r') as file:
+                config_data = json.load(file)
+        except json.JSONDecodeError:
+            config_data = None
+            print("❗ kicad_common.json is corrupted or invalid, skipped.")
 
-        with open(config_file, 'w') as file:
-            json.dump(config_data, file, indent=4)
-        print("✅ EASYEDA2KICAD path removed from kicad_common.json")
+        env_vars = ((config_data or {}).get('environment') or {}).get('vars')
+        if isinstance(env_vars, dict) and 'EASYEDA2KICAD' in env_vars:
+            del env_vars['EASYEDA2KICAD']
+            atomic_write(config_file, json.dumps(config_data, indent=4).encode('utf-8'))
+            print("✅ EASYEDA2KICAD path removed from kicad_common.json")
 
     # Clean sym-lib-table
-    sym_lib_table = os.path.join(config_path, 'sym-lib-table')
-    if os.path.exists(sym_lib_table):
-        with open(sym_lib_table, 'r') as file:
-            lines = file.readlines()
-        with open(sym_lib_table, 'w') as file:
-            file.writelines([line for line in lines if 'easyeda2kicad.kicad_sym' not in line])
+    if remove_lib_table_entries(os.path.join(config_path, 'sym-lib-table')):
         print("✅ EasyEDA2KiCAD Symbol Library removed from sym-lib-table")
 
     # Clean fp-lib-table
-    fp_lib_table = os.path.join(config_path, 'fp-lib-table')
-    if os.path.exists(fp_lib_table):
-        with open(fp_lib_table, 'r') as file:
-            lines = file.readlines()
-        with open(fp_lib_table, 'w') as file:
-            file.writelines([line for line in lines if 'easyeda2kicad.pretty' not in line])
+    if remove_lib_table_entries(os.path.join(config_path, 'fp-lib-table')):
         print("✅ EasyEDA2KiCAD Footprint Library removed from fp-lib-table")
 
+    # The fingerprints describe the configured state and are stale from now on
+    fingerprints = os.path.join(config_path, FINGERPRINTS_NAME)
+    if os.path.exists(fingerprints):
+        os.remove(fingerprints)
+
 if __name__ == "__main__":
-    config_paths = get_kicad_config_path()
+    config_paths = get_kicad_config_dirs()
     if not config_paths:
         print("❗ KiCad configuration file not found. Ensure KiCad has been run at least once.")
     else:
@@ -0,0 +1,290 @@
+import subprocess
+import threading
+import time
+import queue
+import atexit
+
+try:
+    from .easyeda2kicad_worker import WorkerUnavailable, WorkerCrashed, WorkerTimeout
+except ImportError:
+    from easyeda2kicad_worker import WorkerUnavailable, WorkerCrashed, WorkerTimeout
+
+## @brief Lifecycle states of an `ImportJob`.
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_TIMED_OUT = "timed out"
+
+## @brief States after which a job will not change anymore.
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED, JOB_TIMED_OUT)
+
+## @brief A single `easyeda2kicad` invocation scheduled on an `ImportExecutor`.
+class ImportJob:
+    ## @brief Creates a new job.
+    #  @param part_number LCSC part number the job imports.
+    #  @param command Full argument list of the process to run.
+    #  @param env Environment for the child process.
+    #  @param timeout Seconds before the child is killed, `None` or 0 to wait forever.
+    #  @param on_progress Called as `on_progress(job)` whenever the job state changes.
+    #  @param on_done Called as `on_done(job)` once the job has finished.
+    #  @param warm_pool Optional `WarmConverterPool` that runs the job without spawning a new process.
+    def __init__(self, part_number, command, env=None, timeout=None, on_progress=None, on_done=None, warm_pool=None):
+        self.part_number = part_number
+        self.command = command
+        self.env = env
+        self.timeout = timeout or None
+        self.warm_pool = warm_pool
+        self.on_progress = on_progress
+        self.on_done = on_done
+
+        self.state = JOB_QUEUED
+        self.returncode = None
+        self.stdout = ""
+        self.stderr = ""
+        self.error = None
+
+        # `time.perf_counter()` stamps of the job's phases, used for import telemetry
+        self.submitted_at = None
+        self.started_at = None
+        self.spawned_at = None
+        self.finished_at = None
+        self.warm = False
+
+        self._lock = threading.Lock()
+        self._process = None
+        self._cancelled = False
+        self._finished = threading.Event()
+
+    ## @brief Tells whether the job has reached a final state.
+    def done(self):
+        return self._finished.is_set()
+
+    ## @brief Blocks until the job has finished.
+    #  @param timeout Maximum number of seconds to wait.
+    #  @return True if the job finished within the timeout.
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+    ## @brief Cancels the job, killing the child process if it is already running.
+    def cancel(self):
+        with self._lock:
+            if self.done():
+                return
+            self._cancelled = True
+            process = self._process
+        if process is not None:
+            _kill_process(process)
+
+## @brief Kills a child process, ignoring processes that already exited.
+def _kill_process(process):
+    try:
+        process.kill()
+    except OSError:
+        pass
+
+## @brief Bounded thread pool running `ImportJob`s off the GUI thread.
+#  @details Jobs submitted while all workers are busy are queued and started in
+#  submission order. Callbacks are routed through `dispatch`, which the panel sets
+#  to `wx.CallAfter` so that they always run on the GUI thread.
+class ImportExecutor:
+    ## @brief Creates the executor.
+    #  @param max_workers Maximum number of jobs running at the same time.
+    #  @param dispatch Callable used to deliver callbacks, e.g. `wx.CallAfter`.
+    def __init__(self, max_workers=2, dispatch=None):
+        self.max_workers = max(1, int(max_workers))
+        self._dispatch = dispatch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._jobs = []
+        self._threads = []
+        self._idle = 0
+        self._shutdown = False
+
+    ## @brief Queues a job for execution.
+    #  @param job The `ImportJob` to run.
+    #  @return The same job, for convenience.
+    def submit(self, job):
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("ImportExecutor has been shut down.")
+            self._jobs.append(job)
+            job.submitted_at = time.perf_counter()
+            # Start another worker only when none is idle and the pool is not full
+            if self._idle <= 0 and len(self._threads) < self.max_workers:
+                thread = threading.Thread(
+                    target=self._worker,
+                    name=f"easyeda2kicad-import-{len(self._threads)}",
+                    daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+            else:
+                self._idle -= 1
+        self._notify(job, job.on_progress)
+        self._queue.put(job)
+        return job
+
+    ## @brief Returns the jobs that have not finished yet.
+    def pending_jobs(self):
+        with self._lock:
+            self._jobs = [job for job in self._jobs if not job.done()]
+            return list(self._jobs)
+
+    ## @brief Cancels every queued and running job.
+    def cancel_all(self):
+        for job in self.pending_jobs():
+            job.cancel()
+
+    ## @brief Cancels all jobs and stops the worker threads.
+    #  @param wait Block until the worker threads have exited.
+    def shutdown(self, wait=False):
+        with self._lock:
+            self._shutdown = True
+            threads = list(self._threads)
+        self.cancel_all()
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    ## @brief Worker thread loop; a `None` job stops the worker.
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                with self._lock:
+                    self._idle += 1
+
+    ## @brief Worker entry point: runs a single job to completion.
+    def _run(self, job):
+        job.started_at = time.perf_counter()
+        with job._lock:
+            job.state = JOB_CANCELLED if job._cancelled else JOB_RUNNING
+
+        if job.state == JOB_RUNNING:
+            self._notify(job, job.on_progress)
+            # Prefer a warm worker; fall back to a fresh process when the venv cannot host one
+            if job.warm_pool is None or not job.warm_pool.available or not self._run_warm(job):
+                self._run_process(job)
+
+        job.finished_at = time.perf_counter()
+        job._finished.set()
+        self._notify(job, job.on_progress)
+        self._notify(job, job.on_done)
+
+    ## @brief Runs a job in a new `easyeda2kicad` child process.
+    def _run_process(self, job):
+        with job._lock:
+            if job._cancelled:
+                job.state = JOB_CANCELLED
+                return
+            try:
+                job._process = subprocess.Popen(
+                    job.command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    env=job.env
+                )
+            except Exception as e:
+                job.state = JOB_FAILED
+                job.error = e
+                return
+            job.spawned_at = time.perf_counter()
+        self._communicate(job)
+
+    ## @brief Runs a job on a warm converter worker.
+    #  @details A worker that crashes mid-job is restarted and the job retried once.
+    #  @return False if no worker could be started and the job still has to run.
+    def _run_warm(self, job):
+        pool = job.warm_pool
+        for attempt in range(2):
+            converter = pool.acquire()
+            try:
+                try:
+                    process = converter.ensure_started()
+                except WorkerUnavailable:
+                    pool.available = False
+                    return False
+
+                with job._lock:
+                    if job._cancelled:
+                        job.state = JOB_CANCELLED
+                        return True
+                    job._process = process
+                    job.spawned_at = time.perf_counter()
+                    job.warm = True
+
+                try:
+                    job.returncode, job.stdout, job.stderr = converter.run(job.command[1:], timeout=job.timeout)
+                except WorkerTimeout:
+                    job.state = JOB_TIMED_OUT
+                    return True
+                except WorkerCrashed as e:
+                    if job._cancelled:
+                        job.state = JOB_CANCELLED
+                        return True
+                    if attempt == 0:
+                        continue
+                    job.state = JOB_FAILED
+                    job.error = e
+                    job.stderr = e.stderr
+                    return True
+            finally:
+                pool.release(converter)
+
+            job.state = JOB_SUCCEEDED if job.returncode == 0 else JOB_FAILED
+            return True
+        return True
+
+    ## @brief Waits for the child process of a running job and records its outcome.
+    def _communicate(self, job):
+        process = job._process
+        try:
+            job.stdout, job.stderr = process.communicate(timeout=job.timeout)
+        except subprocess.TimeoutExpired:
+            _kill_process(process)
+            job.stdout, job.stderr = process.communicate()
+            job.returncode = process.returncode
+            job.state = JOB_TIMED_OUT
+            return
+
+        job.returncode = process.returncode
+        if job._cancelled:
+            job.state = JOB_CANCELLED
+        elif job.returncode == 0:
+            job.state = JOB_SUCCEEDED
+        else:
+            job.state = JOB_FAILED
+
+    ## @brief Delivers a job callback through the dispatcher.
+    def _notify(self, job, callback):
+        if callback is None:
+            return
+        if self._dispatch is not None:
+            self._dispatch(callback, job)
+        else:
+            callback(job)
+
+## @brief Shared executor used by the plugin panels.
+_executor = None
+_executor_lock = threading.Lock()
+
+## @brief Returns the shared `ImportExecutor`, creating it on first use.
+#  @param max_workers Pool size used when the executor is created.
+#  @param dispatch Callback dispatcher used when the executor is created.
+def get_import_executor(max_workers=2, dispatch=None):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ImportExecutor(max_workers=max_workers, dispatch=dispatch)
+            # Do not leave orphaned `easyeda2kicad` processes behind when KiCad exits
+            atexit.register(_executor.cancel_all)
+        return _executor
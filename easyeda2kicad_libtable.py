@@ -0,0 +1,273 @@
+import os
+import re
+import json
+import hashlib
+
+try:
+    from .easyeda2kicad_symlib import atomic_write
+except ImportError:
+    from easyeda2kicad_symlib import atomic_write
+
+## @brief Tokens of a lib table: quoted strings, parentheses and bare atoms.
+_TOKEN_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|[()]|[^\s()"]+', re.DOTALL)
+
+## @brief Fields of a `(lib ...)` entry in the order KiCad writes them.
+LIB_FIELDS = ("name", "type", "uri", "options", "descr")
+
+## @brief Returns every KiCad configuration folder of the current user.
+#  @details Covers all versioned folders (e.g. `7.0`, `8.0`, `9.0`) as well as the
+#  unversioned legacy folder and the macOS preferences folder.
+#  @return A list of folders containing `kicad_common.json` or lib tables.
+def get_kicad_config_dirs():
+    if os.name == 'nt':  # Windows
+        bases = [os.path.join(os.environ.get('APPDATA', ''), "kicad")]
+    else:  # Linux and macOS
+        bases = [
+            os.path.join(os.path.expanduser("~"), ".config", "kicad"),
+            os.path.join(os.path.expanduser("~"), "Library", "Preferences", "kicad"),
+        ]
+
+    directories = []
+    for base in bases:
+        if not base or not os.path.isdir(base):
+            continue
+        versions = [d for d in os.listdir(base) if d[:1].isdigit() and os.path.isdir(os.path.join(base, d))]
+        for version in sorted(versions, key=_version_key):
+            directories.append(os.path.join(base, version))
+        if any(os.path.exists(os.path.join(base, name)) for name in ("kicad_common.json", "sym-lib-table", "fp-lib-table")):
+            directories.append(base)
+    return directories
+
+## @brief Sort key for version folder names such as `8.0` or `10.0`.
+def _version_key(version):
+    return [int(part) if part.isdigit() else 0 for part in version.split(".")]
+
+## @brief Quotes a value the way KiCad writes lib table strings.
+def quote(value):
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+## @brief Removes the quotes and escapes of a string token.
+def _unquote(token):
+    if token.startswith('"'):
+        body = token[1:-1]
+        return re.sub(r'\\(.)', r'\1', body) if '\\' in body else body
+    return token
+
+## @brief Parses the tokens of one list into nested Python lists of strings.
+def _parse_list(tokens, position):
+    items = []
+    while position < len(tokens):
+        token = tokens[position]
+        if token == "(":
+            child, position = _parse_list(tokens, position + 1)
+            items.append(child)
+        elif token == ")":
+            return items, position + 1
+        else:
+            items.append(_unquote(token))
+            position += 1
+    raise ValueError("Unbalanced parentheses in lib table")
+
+## @brief In-memory `sym-lib-table` / `fp-lib-table` with a name index.
+#  @details Entries that are not modified keep their original text, so saving a
+#  table only reformats the lines this plugin touched.
+class LibTable:
+    ## @brief Creates a table.
+    #  @param kind Root keyword, `sym_lib_table` or `fp_lib_table`.
+    #  @param items List of `(name, text)` children; `name` is None for non-`lib` children like `(version 7)`.
+    def __init__(self, kind, items=None):
+        self.kind = kind
+        self.items = list(items or [])
+        self._fields = {}
+        self._reindex()
+
+    ## @brief Parses the text of a lib table.
+    @classmethod
+    def parse(cls, text):
+        matches = list(_TOKEN_PATTERN.finditer(text))
+        if len(matches) < 2 or matches[0].group() != "(":
+            raise ValueError("Not a KiCad lib table")
+        kind = matches[1].group()
+
+        items = []
+        fields = {}
+        depth = 0
+        start = None
+        tokens = []
+        for match in matches[2:]:
+            token = match.group()
+            if token == "(":
+                if depth == 0:
+                    start = match.start()
+                    tokens = []
+                depth += 1
+            elif token == ")":
+                if depth == 0:
+                    break  # Closing parenthesis of the table itself
+                depth -= 1
+            if depth > 0 or token == ")":
+                tokens.append(token)
+            if depth == 0 and start is not None:
+                parsed, _ = _parse_list(tokens, 1)
+                name = _entry_name(parsed)
+                items.append((name, text[start:match.end()]))
+                if name is not None:
+                    fields[name] = _entry_fields(parsed)
+                start = None
+        else:
+            raise ValueError("Unbalanced parentheses in lib table")
+        table = cls(kind, items)
+        table._fields = fields
+        return table
+
+    ## @brief Loads a lib table file.
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as file:
+            return cls.parse(file.read())
+
+    ## @brief Returns the library names in table order.
+    def names(self):
+        return [name for name, _ in self.items if name is not None]
+
+    ## @brief Tells whether a library nickname is present.
+    def __contains__(self, name):
+        return name in self._index
+
+    ## @brief Returns the fields of an entry.
+    #  @return A dictionary of field name to value, or None if the entry does not exist.
+    def get(self, name):
+        position = self._index.get(name)
+        if position is None:
+            return None
+        if name not in self._fields:
+            parsed, _ = _parse_list([match.group() for match in _TOKEN_PATTERN.finditer(self.items[position][1])], 1)
+            self._fields[name] = _entry_fields(parsed)
+        return dict(self._fields[name])
+
+    ## @brief Adds or updates a library entry.
+    #  @param name Library nickname.
+    #  @param fields Values for `type`, `uri`, `options` and `descr`.
+    #  @return True if the table changed.
+    def set(self, name, **fields):
+        values = {"name": name, "type": "KiCad", "options": "", "descr": ""}
+        values.update(fields)
+        current = self.get(name)
+        if current is not None and all(current.get(key, "") == values[key] for key in LIB_FIELDS):
+            return False
+
+        text = "(lib " + "".join(f"({key} {quote(values[key])})" for key in LIB_FIELDS) + ")"
+        self._fields[name] = {key: values[key] for key in LIB_FIELDS}
+        if current is not None:
+            self.items[self._index[name]] = (name, text)
+        else:
+            self.items.append((name, text))
+            self._index[name] = len(self.items) - 1
+        return True
+
+    ## @brief Removes entries matching a predicate.
+    #  @param predicate Called with `(name, fields)`, returns True for entries to remove.
+    #  @return The removed library names.
+    def remove_where(self, predicate):
+        removed = [name for name in self.names() if predicate(name, self.get(name))]
+        if removed:
+            doomed = set(removed)
+            self.items = [(name, text) for name, text in self.items if name not in doomed]
+            for name in doomed:
+                self._fields.pop(name, None)
+            self._reindex()
+        return removed
+
+    ## @brief Serialises the table in KiCad's layout.
+    def dumps(self):
+        return f"({self.kind}\n" + "".join(f"  {text}\n" for _, text in self.items) + ")\n"
+
+    ## @brief Writes the table atomically.
+    def save(self, path):
+        atomic_write(path, self.dumps().encode('utf-8'))
+
+    def _reindex(self):
+        self._index = {name: position for position, (name, _) in enumerate(self.items) if name is not None}
+
+## @brief Returns the nickname of a parsed `(lib ...)` child, None for other children.
+def _entry_name(parsed):
+    if not parsed or parsed[0] != "lib":
+        return None
+    for item in parsed[1:]:
+        if isinstance(item, list) and len(item) > 1 and item[0] == "name":
+            return item[1]
+    return None
+
+## @brief Returns the fields of a parsed `(lib ...)` child as a dictionary.
+def _entry_fields(parsed):
+    return {item[0]: (item[1] if len(item) > 1 else "") for item in parsed[1:] if isinstance(item, list) and item}
+
+## @brief Remembers the state of configuration files after this plugin last handled them.
+#  @details A file whose size and mtime still match, and whose desired
+#  configuration has not changed, is skipped without being read at all. The
+#  content hash is kept as well, so an mtime-only change (e.g. a touch or a
+#  copy) is recognised as unchanged after a single read.
+class ConfigFingerprints:
+    ## @brief Loads the fingerprint store.
+    #  @param path JSON file holding the fingerprints.
+    def __init__(self, path):
+        self.path = path
+        self._dirty = False
+        try:
+            with open(path, 'r') as file:
+                self._entries = json.load(file)
+        except (OSError, ValueError):
+            self._entries = {}
+        if not isinstance(self._entries, dict):
+            self._entries = {}
+
+    ## @brief Tells whether a file is still in the state recorded for `desired`.
+    #  @param path Configuration file.
+    #  @param desired Key describing the wanted configuration, see `desired_key()`.
+    def unchanged(self, path, desired):
+        entry = self._entries.get(os.path.abspath(path))
+        if entry is None or entry.get("desired") != desired:
+            return False
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return entry.get("missing", False)
+        if entry.get("size") != stat.st_size:
+            return False
+        if entry.get("mtime_ns") == stat.st_mtime_ns:
+            return True
+        if entry.get("sha256") == _file_hash(path):
+            self.remember(path, desired)
+            return True
+        return False
+
+    ## @brief Records the current state of a file for `desired`.
+    def remember(self, path, desired):
+        try:
+            stat = os.stat(path)
+            entry = {"desired": desired, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": _file_hash(path)}
+        except FileNotFoundError:
+            entry = {"desired": desired, "missing": True}
+        self._entries[os.path.abspath(path)] = entry
+        self._dirty = True
+
+    ## @brief Writes the fingerprints if anything changed.
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            atomic_write(self.path, json.dumps(self._entries, indent=4).encode('utf-8'))
+            self._dirty = False
+        except OSError:
+            # Fingerprints only speed up reruns; losing them is harmless
+            pass
+
+## @brief Builds a stable key describing a desired configuration.
+def desired_key(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+## @brief Returns the SHA-256 of a file.
+def _file_hash(path):
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
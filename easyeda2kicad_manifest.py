@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+try:
+    from .easyeda2kicad_symlib import SymbolLibrary, atomic_write
+except ImportError:
+    from easyeda2kicad_symlib import SymbolLibrary, atomic_write
+
+## @brief Version of the manifest format; entries of other versions are discarded.
+MANIFEST_VERSION = 1
+
+## @brief Serialises manifest updates from concurrent imports.
+_manifest_lock = threading.Lock()
+
+## @brief Returns the SHA-256 of a file or a string.
+#  @param path File to hash; ignored when `text` is given.
+#  @param text Text to hash instead of a file.
+def content_hash(path=None, text=None):
+    digest = hashlib.sha256()
+    if text is not None:
+        digest.update(text.encode('utf-8'))
+    else:
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+## @brief Record of the parts already imported into a shared library.
+#  @details Stored as `<output_base>.manifest.json`. Each LCSC ID maps to the symbols,
+#  footprints and 3D models it produced, their content hashes and the import time.
+#  Entries whose files have disappeared are dropped on lookup, so the manifest
+#  repairs itself when the library is edited by hand.
+class ImportManifest:
+    ## @brief Opens the manifest of a shared library.
+    #  @param output_base Output base path of the shared library, e.g. `KICAD_PATH/easyeda2kicad`.
+    def __init__(self, output_base):
+        self.output_base = output_base
+        self.path = output_base + ".manifest.json"
+        self._parts = None
+        self._stat = None
+        # One `SymbolLibrary` per library path, so its index is only reloaded when the library changes
+        self._libraries = {}
+
+    ## @brief Returns all entries keyed by LCSC ID, reloading the file when it changed.
+    def parts(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._parts, self._stat = {}, None
+            return self._parts
+
+        if self._parts is None or self._stat is None or (stat.st_mtime_ns, stat.st_size) != self._stat:
+            try:
+                with open(self.path, 'r') as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                print("❗ EasyEDA2KiCAD import manifest is corrupted, starting a new one.")
+                data = {}
+            if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+                data = {"parts": {}}
+            self._parts = data.get("parts", {})
+            self._stat = (stat.st_mtime_ns, stat.st_size)
+        return self._parts
+
+    ## @brief Returns the entry of a part if it is still complete and fresh.
+    #  @param part_number LCSC part number.
+    #  @param ttl Maximum age in seconds; None never expires, 0 always expires.
+    #  @return The entry, or None if the part has to be (re-)imported.
+    def lookup(self, part_number, ttl=None):
+        entry = self.parts().get(part_number)
+        if entry is None:
+            return None
+        if ttl is not None and time.time() - entry.get("imported_at", 0) >= ttl:
+            return None
+        if not self._is_complete(entry):
+            self.forget([part_number])
+            return None
+        return entry
+
+    ## @brief Records the outputs of freshly imported parts.
+    #  @param imports Dictionary of `part_number -> (symbols, footprints, models)`, where
+    #  `symbols` maps names to symbol blocks and the others are file names.
+    #  @param libraries Optional `part_number -> output base` of the shard library a part
+    #  was merged into; parts not listed live in the main library.
+    def record(self, imports, libraries=None):
+        if not imports:
+            return
+        libraries = libraries or {}
+        now = time.time()
+        with _manifest_lock:
+            parts = dict(self.parts())
+            for part_number, (symbols, footprints, models) in imports.items():
+                library_base = libraries.get(part_number, self.output_base)
+                parts[part_number] = {
+                    "symbols": {name: content_hash(text=block) for name, block in symbols.items()},
+                    "footprints": self._hash_files(library_base + ".pretty", footprints),
+                    "models": self._hash_files(self.output_base + ".3dshapes", models),
+                    "imported_at": now,
+                }
+                if library_base != self.output_base:
+                    parts[part_number]["library"] = os.path.basename(library_base)
+            self._save(parts)
+
+    ## @brief Moves entries to another library after their symbols were relocated.
+    #  @param moves Dictionary of `part_number -> (library_base, symbols)` with the new
+    #  output base and the symbol blocks as they are now stored.
+    def relocate(self, moves):
+        with _manifest_lock:
+            parts = dict(self.parts())
+            changed = False
+            for part_number, (library_base, symbols) in moves.items():
+                entry = parts.get(part_number)
+                if entry is None:
+                    continue
+                entry = dict(entry, symbols={name: content_hash(text=block) for name, block in symbols.items()})
+                entry.pop("library", None)
+                if library_base != self.output_base:
+                    entry["library"] = os.path.basename(library_base)
+                parts[part_number] = entry
+                changed = True
+            if changed:
+                self._save(parts)
+
+    ## @brief Output base path of the library an entry lives in.
+    def library_base(self, entry):
+        library = entry.get("library")
+        return os.path.join(os.path.dirname(self.output_base), library) if library else self.output_base
+
+    ## @brief Removes entries, e.g. after their files went missing.
+    #  @param part_numbers LCSC part numbers to drop.
+    def forget(self, part_numbers):
+        with _manifest_lock:
+            parts = dict(self.parts())
+            removed = [part for part in part_numbers if parts.pop(part, None) is not None]
+            if removed:
+                self._save(parts)
+
+    ## @brief Tells whether every file and symbol recorded for a part still exists.
+    def _is_complete(self, entry):
+        library_base = self.library_base(entry)
+        for name in entry.get("footprints", {}):
+            if not os.path.exists(os.path.join(library_base + ".pretty", name)):
+                return False
+        for name in entry.get("models", {}):
+            if not os.path.exists(os.path.join(self.output_base + ".3dshapes", name)):
+                return False
+        symbols = entry.get("symbols", {})
+        if symbols:
+            library = self._library(library_base + ".kicad_sym")
+            if any(name not in library for name in symbols):
+                return False
+        return True
+
+    ## @brief Returns the cached `SymbolLibrary` of a library path.
+    def _library(self, path):
+        library = self._libraries.get(path)
+        if library is None:
+            library = self._libraries[path] = SymbolLibrary(path)
+        return library
+
+    ## @brief Hashes files of a library folder, skipping files that vanished.
+    @staticmethod
+    def _hash_files(directory, names):
+        hashes = {}
+        for name in names:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                hashes[name] = content_hash(path)
+        return hashes
+
+    ## @brief Writes the manifest atomically.
+    def _save(self, parts):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = {"version": MANIFEST_VERSION, "parts": parts}
+        atomic_write(self.path, json.dumps(data, indent=4).encode('utf-8'))
+        stat = os.stat(self.path)
+        self._parts = parts
+        self._stat = (stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,279 @@
+import os
+import sys
+import shutil
+import argparse
+import threading
+
+try:
+    from .easyeda2kicad_settings import KICAD_PATH
+    from .easyeda2kicad_manifest import content_hash
+except ImportError:
+    from easyeda2kicad_settings import KICAD_PATH
+    from easyeda2kicad_manifest import content_hash
+
+## @brief Name of the blob folder inside a `.3dshapes` folder.
+BLOB_FOLDER = ".blobs"
+
+## @brief Ways a per-part model name can be stored, in order of preference.
+#  @details `copy` means the model is kept as a plain file outside the store: a blob
+#  next to a copy of it would take more space than no deduplication at all.
+LINK_MODES = ("hardlink", "symlink", "copy")
+
+## @brief Serialises writers of the same model store within the KiCad process.
+_store_locks = {}
+_store_locks_lock = threading.Lock()
+
+## @brief Content-addressed store for the 3D models of a library.
+#  @details Every distinct model is kept once as `.blobs/<sha256><ext>` inside the
+#  `.3dshapes` folder. The per-part file names footprints refer to are hardlinks
+#  to those blobs, so footprints need no changes; where hardlinks are not
+#  supported, relative symlinks are used instead, and where neither works the
+#  model stays a plain file without a blob. Blobs are read-only, so editing a
+#  model in place cannot silently change other parts.
+class ModelStore:
+    ## @brief Opens the store of a `.3dshapes` folder.
+    #  @param models_dir The `.3dshapes` folder, e.g. `KICAD_PATH/easyeda2kicad.3dshapes`.
+    def __init__(self, models_dir):
+        self.models_dir = models_dir
+        self.blob_dir = os.path.join(models_dir, BLOB_FOLDER)
+
+    ## @brief Moves a model into the store and exposes it under `name`.
+    #  @param source Model file; it is consumed (moved or deleted).
+    #  @param name File name inside the `.3dshapes` folder.
+    #  @return The link mode used, one of `LINK_MODES`.
+    def add(self, source, name):
+        with _get_store_lock(self.models_dir):
+            os.makedirs(self.blob_dir, exist_ok=True)
+            blob = self._blob_path(content_hash(source), name)
+            if os.path.exists(blob):
+                mode = self._link(blob, name)
+                if mode is not None:
+                    os.remove(source)
+            else:
+                os.replace(source, blob)
+                _make_read_only(blob)
+                mode = self._link(blob, name)
+                if mode is None:
+                    # Hand the model back rather than keeping a blob no name can link to
+                    _make_writable(blob)
+                    source = blob
+            if mode is None:
+                self._replace(source, name)
+                mode = "copy"
+            return mode
+
+    ## @brief Moves every plain model of the folder into the store.
+    #  @param dry_run Only count what would be merged.
+    #  @return A dictionary with the number of `files` seen, models `stored` as new
+    #  blobs, `deduplicated` models and the `bytes_saved`.
+    def compact(self, dry_run=False):
+        result = {"files": 0, "stored": 0, "deduplicated": 0, "bytes_saved": 0}
+        with _get_store_lock(self.models_dir):
+            if not dry_run:
+                os.makedirs(self.blob_dir, exist_ok=True)
+            blobs = {self._key(entry) for entry in self._blob_entries()}
+            planned = set()
+            # Without hardlinks or symlinks every model stays a plain file, nothing to save
+            linkable = self._links_supported()
+            for entry in self._model_entries():
+                result["files"] += 1
+                if not linkable or entry.is_symlink() or self._key(entry) in blobs:
+                    continue
+                size = entry.stat().st_size
+                blob = self._blob_path(content_hash(entry.path), entry.name)
+                if os.path.exists(blob) or blob in planned:
+                    if dry_run or self._link(blob, entry.name) is not None:
+                        result["deduplicated"] += 1
+                        result["bytes_saved"] += size
+                    continue
+                if not dry_run:
+                    # Hardlink the original into the store first, so the name never disappears
+                    try:
+                        os.link(entry.path, blob)
+                    except OSError:
+                        shutil.copyfile(entry.path, blob)
+                        if self._link(blob, entry.name) is None:
+                            os.remove(blob)
+                            continue
+                    _make_read_only(blob)
+                    blobs.add(self._key(os.stat(blob)))
+                result["stored"] += 1
+                planned.add(blob)
+        if not dry_run:
+            self.collect_garbage()
+        return result
+
+    ## @brief Deletes blobs no model name refers to any more.
+    #  @return A tuple `(removed, bytes_freed)`.
+    def collect_garbage(self):
+        removed = 0
+        freed = 0
+        with _get_store_lock(self.models_dir):
+            referenced = set()
+            for entry in self._model_entries():
+                if entry.is_symlink():
+                    referenced.add(os.path.realpath(entry.path))
+                else:
+                    referenced.add(self._key(entry))
+            for entry in self._blob_entries():
+                if self._key(entry) in referenced or os.path.realpath(entry.path) in referenced:
+                    continue
+                size = entry.stat().st_size
+                try:
+                    _make_writable(entry.path)
+                    os.remove(entry.path)
+                except OSError:
+                    continue
+                removed += 1
+                freed += size
+        return removed, freed
+
+    ## @brief Returns the logical and the physical size of the store.
+    def stats(self):
+        blobs = list(self._blob_entries())
+        blob_keys = {self._key(entry) for entry in blobs}
+        models = list(self._model_entries())
+        unmanaged = [entry for entry in models if not entry.is_symlink() and self._key(entry) not in blob_keys]
+        return {
+            "models": len(models),
+            "blobs": len(blobs),
+            "unmanaged": len(unmanaged),
+            "logical_bytes": sum(entry.stat().st_size for entry in models),
+            "physical_bytes": sum(entry.stat().st_size for entry in blobs) + sum(entry.stat().st_size for entry in unmanaged),
+        }
+
+    ## @brief Points `name` at `blob`, replacing any previous file atomically.
+    #  @return The link mode used, or None if neither hardlinks nor symlinks are
+    #  supported; `name` is left untouched then.
+    def _link(self, blob, name):
+        target = os.path.join(self.models_dir, name)
+        try:
+            if os.path.samefile(target, blob):
+                return "symlink" if os.path.islink(target) else "hardlink"
+        except OSError:
+            pass
+
+        temp = self._temp_path(name)
+        for mode in LINK_MODES[:-1]:
+            try:
+                if mode == "hardlink":
+                    os.link(blob, temp)
+                else:
+                    os.symlink(os.path.relpath(blob, self.models_dir), temp)
+                break
+            except OSError:
+                if os.path.lexists(temp):
+                    os.remove(temp)
+        else:
+            return None
+        self._replace(temp, name)
+        return mode
+
+    ## @brief Moves `source` to `name`, replacing any previous file atomically.
+    #  @details A blob that was only referenced by the replaced hardlink is deleted right away.
+    def _replace(self, source, name):
+        target = os.path.join(self.models_dir, name)
+        try:
+            previous = os.stat(target, follow_symlinks=False)
+        except OSError:
+            previous = None
+        os.replace(source, target)
+
+        # Incremental garbage collection for the common re-import case
+        if previous is not None and previous.st_nlink == 2:
+            for entry in self._blob_entries():
+                if self._key(entry) == self._key(previous):
+                    _make_writable(entry.path)
+                    os.remove(entry.path)
+                    break
+
+    ## @brief Tells whether the folder supports hardlinks or symlinks.
+    def _links_supported(self):
+        probe = self._temp_path("probe")
+        try:
+            open(probe, 'wb').close()
+        except OSError:
+            return False
+        try:
+            for link in (os.link, os.symlink):
+                try:
+                    link(probe, probe + ".link")
+                except OSError:
+                    continue
+                os.remove(probe + ".link")
+                return True
+            return False
+        finally:
+            os.remove(probe)
+
+    def _temp_path(self, name):
+        return os.path.join(self.models_dir, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    def _blob_path(self, digest, name):
+        return os.path.join(self.blob_dir, digest + os.path.splitext(name)[1].lower())
+
+    def _model_entries(self):
+        return [entry for entry in _scan(self.models_dir) if not entry.name.startswith(".") and (entry.is_file() or entry.is_symlink())]
+
+    def _blob_entries(self):
+        return [entry for entry in _scan(self.blob_dir) if entry.is_file(follow_symlinks=False)]
+
+    ## @brief Identity of a file for hardlink comparisons.
+    #  @details Models and blobs live on the same file system, so the inode number is
+    #  enough; for `os.DirEntry` it usually comes straight from the directory listing.
+    @staticmethod
+    def _key(entry):
+        return entry.inode() if isinstance(entry, os.DirEntry) else entry.st_ino
+
+def _scan(directory):
+    try:
+        with os.scandir(directory) as entries:
+            return list(entries)
+    except FileNotFoundError:
+        return []
+
+## @brief Removes the write permission of a blob (not on Windows, where read-only files cannot be replaced).
+def _make_read_only(path):
+    if os.name != 'nt':
+        os.chmod(path, os.stat(path).st_mode & 0o7555)
+
+def _make_writable(path):
+    if os.name != 'nt':
+        os.chmod(path, os.stat(path).st_mode | 0o200)
+
+## @brief Returns the lock guarding a model store.
+def _get_store_lock(path):
+    with _store_locks_lock:
+        return _store_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+## @brief Command-line entry point: compacts an existing `.3dshapes` folder in one go.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deduplicate the 3D models of an EasyEDA2KiCAD library.")
+    parser.add_argument("--path", default=os.path.join(KICAD_PATH, "easyeda2kicad.3dshapes"), help=".3dshapes folder to compact")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be deduplicated")
+    parser.add_argument("--gc", action="store_true", help="only delete blobs no model refers to")
+    parser.add_argument("--stats", action="store_true", help="print the store statistics and exit")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.path):
+        print(f"❗ 3D model folder not found: {args.path}")
+        return 1
+
+    store = ModelStore(args.path)
+    if args.stats:
+        stats = store.stats()
+        print(f"{stats['models']} models, {stats['blobs']} blobs, {stats['unmanaged']} not deduplicated")
+        print(f"{stats['logical_bytes'] / 1024 / 1024:.1f} MiB referenced, {stats['physical_bytes'] / 1024 / 1024:.1f} MiB on disk")
+        return 0
+    if args.gc:
+        removed, freed = store.collect_garbage()
+        print(f"✅ Removed {removed} unreferenced blobs ({freed / 1024 / 1024:.1f} MiB).")
+        return 0
+
+    result = store.compact(dry_run=args.dry_run)
+    verb = "Would deduplicate" if args.dry_run else "Deduplicated"
+    print(f"✅ {verb} {result['deduplicated']} of {result['files']} models, {result['bytes_saved'] / 1024 / 1024:.1f} MiB saved.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,466 @@
+import os
+import sys
+import json
+import time
+import atexit
+import hashlib
+import argparse
+import threading
+import contextlib
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    from .easyeda2kicad_settings import KICAD_PATH, load_settings
+    from .easyeda2kicad_symlib import atomic_write
+except ImportError:
+    from easyeda2kicad_settings import KICAD_PATH, load_settings
+    from easyeda2kicad_symlib import atomic_write
+
+## @brief Environment variable holding the base URL of the proxy the converter talks to.
+PROXY_ENV = "EASYEDA2KICAD_PROXY"
+
+## @brief Environment variable holding the hook script the warm worker applies by hand.
+HOOK_ENV = "EASYEDA2KICAD_PROXY_HOOK"
+
+## @brief Hosts (and their subdomains) whose responses are routed through the proxy.
+PROXIED_HOSTS = ("easyeda.com", "lcsc.com", "jlcpcb.com")
+
+## @brief Default folder of the on-disk response cache.
+CACHE_PATH = os.path.join(KICAD_PATH, ".api-cache")
+
+## @brief Folder of the generated `sitecustomize` hook put on the converter's PYTHONPATH.
+SHIM_PATH = os.path.join(KICAD_PATH, ".api-shim")
+
+## @brief Seconds to wait for EasyEDA/LCSC before serving a stale copy or failing.
+UPSTREAM_TIMEOUT = 30
+
+## @brief Request headers passed on to EasyEDA/LCSC.
+FORWARDED_HEADERS = ("User-Agent", "Accept", "Accept-Language")
+
+## @brief Response headers kept in the cache and returned to the converter.
+STORED_HEADERS = ("Content-Type",)
+
+## @brief Response header telling how a request was answered (`hit`, `miss`, `stale`, `offline`).
+CACHE_STATUS_HEADER = "X-EasyEDA2KiCAD-Cache"
+
+## @brief Source of the `sitecustomize` hook loaded by the `easyeda2kicad` process.
+#  @details Rewrites GET requests to `PROXIED_HOSTS` made through `requests` into
+#  `<proxy>/fetch?url=<original URL>`. The hook must only use the standard library
+#  and `requests`, as it runs inside the pipx venv.
+SHIM_SOURCE = '''\
+# Generated by the EasyEDA2KiCAD KiCad plugin, do not edit.
+# Routes the EasyEDA/LCSC requests of `easyeda2kicad` through the plugin's caching proxy.
+import os
+import sys
+
+_HOSTS = {hosts!r}
+
+def _install():
+    proxy = os.environ.get({proxy_env!r})
+    if not proxy:
+        return
+    try:
+        import requests.models
+        import requests.sessions
+        from urllib.parse import quote, urlsplit
+    except ImportError:
+        return
+
+    original = requests.sessions.Session.request
+    if getattr(original, "_easyeda2kicad_proxy", False):
+        return
+
+    def request(self, method, url, *args, **kwargs):
+        if str(method).upper() == "GET" and isinstance(url, str):
+            host = (urlsplit(url).hostname or "").lower()
+            if any(host == name or host.endswith("." + name) for name in _HOSTS):
+                if kwargs.get("params"):
+                    prepared = requests.models.PreparedRequest()
+                    prepared.prepare_url(url, kwargs.pop("params"))
+                    url = prepared.url
+                url = proxy.rstrip("/") + "/fetch?url=" + quote(url, safe="")
+        return original(self, method, url, *args, **kwargs)
+
+    request._easyeda2kicad_proxy = True
+    requests.sessions.Session.request = request
+
+_install()
+
+# Chain to the sitecustomize this file shadows, if any
+if __name__ == "sitecustomize":
+    import importlib.machinery
+    import importlib.util
+    _here = os.path.dirname(os.path.abspath(__file__))
+    _spec = importlib.machinery.PathFinder.find_spec(
+        "sitecustomize", [path for path in sys.path if os.path.abspath(path or ".") != _here]
+    )
+    if _spec is not None and _spec.loader is not None:
+        _spec.loader.exec_module(importlib.util.module_from_spec(_spec))
+'''
+
+## @brief Tells whether a URL belongs to one of the `PROXIED_HOSTS`.
+def is_proxied_url(url):
+    parts = urllib.parse.urlsplit(url)
+    host = (parts.hostname or "").lower()
+    return parts.scheme in ("http", "https") and any(host == name or host.endswith("." + name) for name in PROXIED_HOSTS)
+
+## @brief On-disk, size-bounded LRU store of HTTP responses.
+#  @details Every response is one file named after the SHA-256 of its URL: a JSON
+#  metadata line followed by the body. Hits bump the file's mtime, which is the
+#  LRU order used when the store grows beyond `max_bytes`.
+class ResponseCache:
+    ## @brief Opens a cache folder.
+    #  @param directory Folder holding the entries, created on the first write.
+    #  @param max_bytes Size limit; the least recently used entries are evicted beyond it.
+    #  @param ttl Seconds an entry is fresh, None to never expire.
+    def __init__(self, directory=CACHE_PATH, max_bytes=512 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._total = None
+
+    ## @brief Looks up a response.
+    #  @param url Requested URL.
+    #  @return A tuple `(status, headers, body, fresh)`, or None if the URL is not cached.
+    def get(self, url):
+        path = self._path(url)
+        try:
+            with open(path, 'rb') as file:
+                meta = json.loads(file.readline())
+                body = file.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        fresh = self.ttl is None or time.time() - meta.get("stored_at", 0) < self.ttl
+        return meta["status"], meta.get("headers", {}), body, fresh
+
+    ## @brief Stores a response, evicting older entries if the size limit is exceeded.
+    def put(self, url, status, headers, body):
+        meta = {
+            "url": url,
+            "status": status,
+            "headers": {name: value for name, value in headers.items() if name in STORED_HEADERS},
+            "stored_at": time.time(),
+        }
+        content = json.dumps(meta).encode('utf-8') + b"\n" + body
+        path = self._path(url)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            total = self._size()
+            try:
+                total -= os.path.getsize(path)
+            except OSError:
+                pass
+            atomic_write(path, content)
+            self._total = total + len(content)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    ## @brief Removes every entry.
+    def clear(self):
+        with self._lock:
+            for entry in self._entries():
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            self._total = 0
+
+    ## @brief Returns the number of entries and their total size.
+    def stats(self):
+        with self._lock:
+            entries = list(self._entries())
+            return {"entries": len(entries), "bytes": sum(entry.stat().st_size for entry in entries), "max_bytes": self.max_bytes}
+
+    ## @brief Deletes least recently used entries until the cache is below 90 % of its limit.
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        target = self.max_bytes * 0.9
+        for entry in entries:
+            if self._total <= target:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self._total -= size
+
+    ## @brief Returns the total size of the cache, scanning it once.
+    def _size(self):
+        if self._total is None:
+            self._total = sum(entry.stat().st_size for entry in self._entries())
+        return self._total
+
+    def _entries(self):
+        try:
+            with os.scandir(self.directory) as entries:
+                return [entry for entry in entries if entry.name.endswith(".entry") and entry.is_file()]
+        except FileNotFoundError:
+            return []
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode('utf-8')).hexdigest() + ".entry")
+
+## @brief Fetches a URL from EasyEDA/LCSC.
+#  @return A tuple `(status, headers, body)`; HTTP errors are returned, not raised.
+#  @throws OSError if the server cannot be reached.
+def fetch_upstream(url, headers, timeout=UPSTREAM_TIMEOUT):
+    request = urllib.request.Request(url, headers=dict(headers, **{"Accept-Encoding": "identity"}))
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, dict(response.headers.items()), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers.items()), e.read()
+
+## @brief Tells whether a response may be cached.
+#  @details Only successful responses are stored; EasyEDA answers unknown parts
+#  with HTTP 200 and `"success": false`, which must not stick either.
+def is_cacheable(url, status, body):
+    if status != 200:
+        return False
+    if "/api/products/" in url:
+        try:
+            return json.loads(body).get("success", True) is not False
+        except (ValueError, AttributeError):
+            return False
+    return True
+
+## @brief Local HTTP caching proxy for the EasyEDA/LCSC API.
+#  @details Serves `GET /fetch?url=<URL>` for `PROXIED_HOSTS`. Fresh cache entries
+#  are returned without contacting the server; stale entries are only used when
+#  the server is unreachable or failing. In offline mode nothing is fetched and
+#  uncached URLs fail with 504. `GET /status` returns the cache statistics.
+class CachingProxy:
+    ## @brief Creates a proxy; call `start()` to serve.
+    #  @param cache The `ResponseCache` to use.
+    #  @param offline Serve only from the cache.
+    #  @param host Address to bind, loopback by default.
+    #  @param port Port to bind, 0 picks a free one.
+    #  @param fetch Upstream fetcher with the signature of `fetch_upstream`, replaceable in tests.
+    def __init__(self, cache, offline=False, host="127.0.0.1", port=0, fetch=fetch_upstream):
+        self.cache = cache
+        self.offline = offline
+        self.fetch = fetch
+        self._server = ThreadingHTTPServer((host, port), _ProxyRequestHandler)
+        self._server.daemon_threads = True
+        self._server.proxy = self
+        self._thread = None
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    ## @brief Base URL of the proxy, e.g. `http://127.0.0.1:53124`.
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    ## @brief Serves requests on a daemon thread.
+    #  @return The proxy itself.
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="easyeda2kicad-proxy", daemon=True)
+            self._thread.start()
+        return self
+
+    ## @brief Serves requests on the calling thread until interrupted.
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    ## @brief Stops serving and releases the port.
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    ## @brief Answers one request.
+    #  @param url Requested URL.
+    #  @param headers Request headers to forward.
+    #  @return A tuple `(status, headers, body, cache_status)`.
+    def handle(self, url, headers):
+        cached = self.cache.get(url)
+        if cached is not None and (cached[3] or self.offline):
+            return cached[0], cached[1], cached[2], "hit"
+        if self.offline:
+            return 504, {"Content-Type": "text/plain"}, f"Offline: {url} is not cached".encode('utf-8'), "offline"
+
+        # Concurrent imports of the same part wait for a single upstream request
+        with self._single_flight(url):
+            cached = self.cache.get(url)
+            if cached is not None and cached[3]:
+                return cached[0], cached[1], cached[2], "hit"
+            try:
+                status, response_headers, body = self.fetch(url, headers)
+            except OSError as e:
+                if cached is not None:
+                    return cached[0], cached[1], cached[2], "stale"
+                return 502, {"Content-Type": "text/plain"}, f"Cannot reach {url}: {e}".encode('utf-8'), "miss"
+
+            if is_cacheable(url, status, body):
+                try:
+                    self.cache.put(url, status, response_headers, body)
+                except OSError:
+                    pass
+            elif cached is not None and (status >= 500 or status == 429):
+                # Rate limited or failing upstream: an old answer beats none
+                return cached[0], cached[1], cached[2], "stale"
+            return status, {name: value for name, value in response_headers.items() if name in STORED_HEADERS}, body, "miss"
+
+    ## @brief Serialises requests for the same URL; the lock is dropped once nobody waits for it.
+    @contextlib.contextmanager
+    def _single_flight(self, url):
+        with self._inflight_lock:
+            lock, waiting = self._inflight.get(url, (None, 0))
+            lock = lock or threading.Lock()
+            self._inflight[url] = (lock, waiting + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._inflight_lock:
+                waiting = self._inflight[url][1] - 1
+                if waiting:
+                    self._inflight[url] = (lock, waiting)
+                else:
+                    del self._inflight[url]
+
+## @brief HTTP request handler of `CachingProxy`.
+class _ProxyRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        proxy = self.server.proxy
+        parts = urllib.parse.urlsplit(self.path)
+        if parts.path == "/status":
+            body = json.dumps(dict(proxy.cache.stats(), offline=proxy.offline)).encode('utf-8')
+            self._respond(200, {"Content-Type": "application/json"}, body)
+            return
+        if parts.path != "/fetch":
+            self._respond(404, {"Content-Type": "text/plain"}, b"Not found")
+            return
+
+        url = urllib.parse.parse_qs(parts.query).get("url", [""])[0]
+        if not is_proxied_url(url):
+            self._respond(403, {"Content-Type": "text/plain"}, b"Only EasyEDA/LCSC URLs are proxied")
+            return
+
+        headers = {name: self.headers[name] for name in FORWARDED_HEADERS if self.headers.get(name)}
+        status, response_headers, body, cache_status = proxy.handle(url, headers)
+        self._respond(status, dict(response_headers, **{CACHE_STATUS_HEADER: cache_status}), body)
+
+    def _respond(self, status, headers, body):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+## @brief Writes the `sitecustomize` hook if it is missing or outdated.
+#  @param directory Folder put on the converter's PYTHONPATH.
+#  @return The path of the hook script.
+def write_shim(directory=SHIM_PATH):
+    path = os.path.join(directory, "sitecustomize.py")
+    source = SHIM_SOURCE.format(hosts=PROXIED_HOSTS, proxy_env=PROXY_ENV).encode('utf-8')
+    try:
+        with open(path, 'rb') as file:
+            if file.read() == source:
+                return path
+    except OSError:
+        pass
+    os.makedirs(directory, exist_ok=True)
+    atomic_write(path, source)
+    return path
+
+## @brief The proxy started by the plugin, shared by all panels.
+_proxy = None
+_proxy_lock = threading.Lock()
+
+## @brief Returns the plugin's caching proxy, starting it on first use.
+#  @param settings Plugin settings; the offline flag, size and TTL are re-applied on every call.
+def get_caching_proxy(settings):
+    global _proxy
+    with _proxy_lock:
+        if _proxy is None:
+            _proxy = CachingProxy(ResponseCache()).start()
+            atexit.register(_proxy.stop)
+        _proxy.offline = bool(settings["api_offline"])
+        _proxy.cache.max_bytes = float(settings["api_cache_size_mb"]) * 1024 * 1024
+        hours = settings["api_cache_ttl_hours"]
+        _proxy.cache.ttl = None if hours is None else float(hours) * 3600
+        return _proxy
+
+## @brief Returns the environment variables routing `easyeda2kicad` through a proxy.
+#  @details An `EASYEDA2KICAD_PROXY` already set in the environment (e.g. a test
+#  stand-in) wins over `api_proxy_url`, which wins over the plugin's own proxy.
+#  @param settings Plugin settings, loaded from disk by default.
+#  @return A dictionary to merge into the subprocess environment, empty when the proxy is disabled.
+def get_proxy_environment(settings=None):
+    settings = settings if settings is not None else load_settings()
+    proxy_url = os.environ.get(PROXY_ENV) or settings["api_proxy_url"]
+    try:
+        if not proxy_url and (settings["api_proxy"] or settings["api_offline"]):
+            proxy_url = get_caching_proxy(settings).url
+        if not proxy_url:
+            return {}
+        hook = write_shim()
+    except OSError as e:
+        print(f"❗ EasyEDA2KiCAD API proxy unavailable, using direct connections: {e}")
+        return {}
+
+    no_proxy = ",".join(value for value in (os.environ.get("NO_PROXY"), "127.0.0.1,localhost") if value)
+    return {
+        PROXY_ENV: proxy_url,
+        HOOK_ENV: hook,
+        "PYTHONPATH": os.path.dirname(hook),
+        "NO_PROXY": no_proxy,
+        "no_proxy": no_proxy,
+    }
+
+## @brief Command-line entry point: runs a standalone proxy, e.g. shared by a team or as a test stand-in.
+def main(argv=None):
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="EasyEDA/LCSC API caching proxy for easyeda2kicad.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind")
+    parser.add_argument("--port", type=int, default=8765, help="port to bind")
+    parser.add_argument("--cache", default=CACHE_PATH, help="cache folder")
+    parser.add_argument("--max-mb", type=float, default=settings["api_cache_size_mb"], help="cache size limit in MiB")
+    parser.add_argument("--ttl-hours", type=float, default=settings["api_cache_ttl_hours"], help="hours a response is fresh")
+    parser.add_argument("--offline", action="store_true", help="serve only from the cache")
+    parser.add_argument("--stats", action="store_true", help="print the cache statistics and exit")
+    parser.add_argument("--clear", action="store_true", help="empty the cache and exit")
+    args = parser.parse_args(argv)
+
+    cache = ResponseCache(args.cache, args.max_mb * 1024 * 1024, args.ttl_hours * 3600)
+    if args.clear:
+        cache.clear()
+        print(f"✅ API cache cleared: {args.cache}")
+        return 0
+    if args.stats:
+        stats = cache.stats()
+        print(f"{stats['entries']} responses, {stats['bytes'] / 1024 / 1024:.1f} of {stats['max_bytes'] / 1024 / 1024:.0f} MiB")
+        return 0
+
+    proxy = CachingProxy(cache, offline=args.offline, host=args.host, port=args.port)
+    print(f"✅ Serving {'cached ' if args.offline else ''}EasyEDA/LCSC API responses on {proxy.url}")
+    print(f"   Start KiCad with {PROXY_ENV}={proxy.url} or set \"api_proxy_url\" in the settings file.")
+    try:
+        proxy.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+import os
+import re
+import mmap
+import bisect
+import threading
+
+try:
+    from .easyeda2kicad_settings import KICAD_PATH
+    from .easyeda2kicad_symlib import SymbolLibrary
+except ImportError:
+    from easyeda2kicad_settings import KICAD_PATH
+    from easyeda2kicad_symlib import SymbolLibrary
+
+## @brief Symbol properties kept in the index, mapped to their record field.
+SEARCH_PROPERTIES = {
+    "LCSC Part": "lcsc",
+    "LCSC": "lcsc",
+    "Value": "value",
+    "Footprint": "footprint",
+    "Datasheet": "datasheet",
+}
+
+## @brief Shortest prefix that is looked up; shorter ones would list half the library.
+MIN_PREFIX = 2
+
+_PROPERTY_PATTERN = re.compile(rb'\(property\s+"((?:[^"\\]|\\.)*)"\s+"((?:[^"\\]|\\.)*)"', re.DOTALL)
+_UNIT_HEAD = b'(symbol "'
+_PROPERTY_FIELDS = {name.encode('utf-8'): field for name, field in SEARCH_PROPERTIES.items()}
+
+## @brief In-memory search index over the symbols of the EasyEDA2KiCAD libraries.
+#  @details Every record holds the symbol name, library, LCSC ID, value, footprint and
+#  datasheet of one symbol. Lower-cased search terms are kept in one sorted list of
+#  `(term, path, name)` tuples, so a prefix lookup is a binary search followed by a
+#  short forward scan, and single symbols can be added or removed with `bisect`.
+#  The index is built in the background on first use from the libraries' span
+#  indexes (see `SymbolLibrary`), reading only the property header of each symbol.
+class SearchIndex:
+    ## @brief Creates an empty index; nothing is read until `refresh_async()` or `refresh()`.
+    #  @param directory Folder holding the libraries.
+    #  @param prefix File name prefix of the libraries to index (main library and shards).
+    def __init__(self, directory=KICAD_PATH, prefix="easyeda2kicad"):
+        self.directory = directory
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._keys = []
+        self._records = {}
+        self._by_lcsc = {}
+        self._stats = {}
+        self._ready = threading.Event()
+        self._refreshing = False
+
+    ## @brief Tells whether the index can answer lookups.
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    ## @brief Builds or refreshes the index on a background thread unless that is already running.
+    #  @details The first call builds the index; later calls only stat the libraries and
+    #  rescan those changed outside the plugin, e.g. by `easyeda2kicad_shards.py`.
+    #  @param on_ready Optional callable invoked (on the background thread) once the index is ready.
+    def refresh_async(self, on_ready=None):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+                self._ready.set()
+                if on_ready is not None:
+                    on_ready()
+        threading.Thread(target=run, name="easyeda2kicad-search", daemon=True).start()
+
+    ## @brief Blocks until the index is ready.
+    def wait(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    ## @brief Rescans libraries that were added, changed or removed since they were indexed.
+    def refresh(self):
+        paths = set(self.library_paths())
+        for path in set(self._stats) - paths:
+            with self._lock:
+                self._remove_library(path)
+        for path in sorted(paths):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if self._stats.get(path) == (stat.st_mtime_ns, stat.st_size):
+                continue
+            records = _read_records(path)
+            with self._lock:
+                self._remove_library(path)
+                for name, record in records.items():
+                    self._add(path, name, record, keep_sorted=False)
+                # One sort of the mostly ordered list beats an insertion per term
+                self._keys.sort()
+                self._stats[path] = (stat.st_mtime_ns, stat.st_size)
+        self._ready.set()
+
+    ## @brief Returns the symbol libraries covered by the index.
+    def library_paths(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, name) for name in names
+                if name.startswith(self.prefix) and name.endswith(".kicad_sym")]
+
+    ## @brief Applies the outcome of an import without rescanning the library.
+    #  @param path Symbol library that was updated.
+    #  @param symbols Dictionary of `name -> symbol block` added or replaced.
+    #  @param removed Names of symbols removed from the library.
+    def update(self, path, symbols=None, removed=()):
+        records = {}
+        for name, block in (symbols or {}).items():
+            data = block.encode('utf-8')
+            records[name] = _parse_record(name, data, 0, len(data))
+        with self._lock:
+            for name in list(removed) + list(records):
+                self._remove(path, name)
+            for name, record in records.items():
+                self._add(path, name, record)
+            # Keep `refresh()` from rescanning a library whose changes are already applied;
+            # a library that was never scanned is still read in full by the next refresh
+            if path in self._stats:
+                try:
+                    stat = os.stat(path)
+                    self._stats[path] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    pass
+
+    ## @brief Returns the symbols with a term starting with `prefix` (case-insensitive).
+    #  @param prefix Typed text, e.g. `C74`, `10k` or `SOT-23`.
+    #  @param limit Maximum number of records.
+    #  @return A list of `(term, record)` tuples, where `term` is the matching field value.
+    def lookup(self, prefix, limit=20):
+        prefix = prefix.strip().lower()
+        if len(prefix) < MIN_PREFIX or not self._ready.is_set():
+            return []
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect.bisect_left(self._keys, (prefix,))
+            while position < len(self._keys) and len(results) < limit:
+                term, path, name = self._keys[position]
+                if not term.startswith(prefix):
+                    break
+                position += 1
+                if (path, name) in seen:
+                    continue
+                seen.add((path, name))
+                record = self._records[(path, name)]
+                results.append((_matching_field(record, term), record))
+        return results
+
+    ## @brief Returns the record of an imported LCSC part, or None.
+    def find_part(self, part_number):
+        with self._lock:
+            key = self._by_lcsc.get(part_number.upper())
+            return self._records.get(key) if key is not None else None
+
+    ## @brief Number of indexed symbols.
+    def __len__(self):
+        return len(self._records)
+
+    def _add(self, path, name, record, keep_sorted=True):
+        record["library"] = os.path.splitext(os.path.basename(path))[0]
+        record["terms"] = _terms(record)
+        self._records[(path, name)] = record
+        for term in record["terms"]:
+            if keep_sorted:
+                bisect.insort(self._keys, (term, path, name))
+            else:
+                self._keys.append((term, path, name))
+        if record.get("lcsc"):
+            self._by_lcsc[record["lcsc"].upper()] = (path, name)
+
+    def _remove(self, path, name):
+        record = self._records.pop((path, name), None)
+        if record is None:
+            return
+        for term in record["terms"]:
+            position = bisect.bisect_left(self._keys, (term, path, name))
+            if position < len(self._keys) and self._keys[position] == (term, path, name):
+                del self._keys[position]
+        if record.get("lcsc") and self._by_lcsc.get(record["lcsc"].upper()) == (path, name):
+            del self._by_lcsc[record["lcsc"].upper()]
+
+    def _remove_library(self, path):
+        self._stats.pop(path, None)
+        names = [name for record_path, name in self._records if record_path == path]
+        if len(names) > 64:
+            # Rebuilding the key list beats thousands of single deletions
+            self._keys = [key for key in self._keys if key[1] != path]
+            for name in names:
+                record = self._records.pop((path, name))
+                if record.get("lcsc") and self._by_lcsc.get(record["lcsc"].upper()) == (path, name):
+                    del self._by_lcsc[record["lcsc"].upper()]
+        else:
+            for name in names:
+                self._remove(path, name)
+
+## @brief Reads the search records of every symbol in a library.
+#  @return A dictionary of symbol name to record.
+def _read_records(path):
+    records = {}
+    # Imports cannot swap the library in while it is mapped (Windows refuses the rename)
+    library = SymbolLibrary(path)
+    with library.lock:
+        spans = library.index()["symbols"]
+        if not spans:
+            return {}
+        with open(path, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for name, (start, end) in spans.items():
+                    records[name] = _parse_record(name, data, start, end)
+    return records
+
+## @brief Extracts the indexed properties from one symbol block.
+#  @details Only the block's header is searched: properties come before the first unit symbol.
+def _parse_record(name, data, start, end):
+    head = data.find(_UNIT_HEAD, start, end)
+    header_end = data.find(_UNIT_HEAD, head + 1, end) if head >= 0 else -1
+    record = {"symbol": name, "lcsc": "", "value": "", "footprint": "", "datasheet": ""}
+    for match in _PROPERTY_PATTERN.finditer(data, start, end if header_end < 0 else header_end):
+        field = _PROPERTY_FIELDS.get(match.group(1))
+        if field is not None and not record[field]:
+            record[field] = _unescape(match.group(2))
+    return record
+
+def _unescape(raw):
+    if b'\\' in raw:
+        raw = re.sub(rb'\\(.)', rb'\1', raw)
+    return raw.decode('utf-8', errors='replace')
+
+## @brief Returns the lower-cased search terms of a record.
+def _terms(record):
+    terms = {record["symbol"], record["lcsc"], record["value"], record["footprint"]}
+    if ":" in record["footprint"]:
+        terms.add(record["footprint"].split(":", 1)[1])
+    datasheet = record["datasheet"].split("?", 1)[0].rstrip("/")
+    if datasheet and datasheet != "~":
+        terms.add(datasheet.rsplit("/", 1)[-1])
+    return sorted(term.lower() for term in terms if term)
+
+## @brief Returns the field value (or the part of it) of a record that produced a search term.
+def _matching_field(record, term):
+    for field in ("lcsc", "value", "symbol", "footprint", "datasheet"):
+        value = record[field]
+        for candidate in (value, value.split(":", 1)[-1], value.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]):
+            if candidate.lower() == term:
+                return candidate
+    return record["symbol"]
+
+_LAST_TOKEN_PATTERN = re.compile(r"^(.*[,;\s])?([^,;\s]*)$", re.DOTALL)
+
+## @brief Builds the autocompletion entries for the text of the part number box.
+#  @details Only the last part number of the text is completed. Every entry starts with
+#  the typed text, as the native completion popups filter on it, and maps to the text
+#  with its last token replaced by the LCSC ID of the suggested part.
+#  @param index The `SearchIndex` to look up.
+#  @param text Current text of the part number box.
+#  @param limit Maximum number of entries.
+#  @return A list of `(completion, replacement)` tuples.
+def complete(index, text, limit=20):
+    before, token = _LAST_TOKEN_PATTERN.match(text).groups()
+    before = before or ""
+    entries = []
+    for term, record in index.lookup(token, limit):
+        details = [detail for detail in (record["lcsc"], record["value"], record["library"]) if detail and detail != term]
+        completion = f"{before}{term}  ({', '.join(details)})" if details else before + term
+        entries.append((completion, before + (record["lcsc"] or term)))
+    return entries
+
+## @brief The index shared by all panels.
+_index = None
+_index_lock = threading.Lock()
+
+## @brief Returns the shared search index; it is only built when first needed.
+def get_search_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex()
+        return _index
@@ -0,0 +1,65 @@
+import os
+import json
+
+## @brief Path where KiCad plugin data will be stored.
+KICAD_PATH = os.path.join(os.path.expanduser("~"), "Documents", "KiCAD", "EASYEDA2KICAD")
+
+## @brief Optional JSON file holding user overrides for the plugin settings.
+SETTINGS_PATH = os.path.join(KICAD_PATH, "easyeda2kicad_settings.json")
+
+## @brief Default plugin settings.
+#  @details Any key may be overridden in `SETTINGS_PATH`; unknown keys are ignored.
+DEFAULT_SETTINGS = {
+    # Maximum number of `easyeda2kicad` processes running at the same time
+    "import_workers": 2,
+    # Seconds before a running import is killed (0 disables the timeout)
+    "import_timeout": 120,
+    # Concurrent `easyeda2kicad` processes used by batch/BOM imports
+    "batch_workers": 4,
+    # Keep `easyeda2kicad` loaded in a long-lived worker instead of spawning it per part
+    "warm_worker": True,
+    # Seconds an idle warm worker is kept alive
+    "worker_idle_timeout": 300,
+    # Days an imported part is considered fresh and not converted again (0 always re-imports)
+    "cache_ttl_days": 30,
+    # Append a timing/outcome record per import to `easyeda2kicad.imports.jsonl`
+    "telemetry": True,
+    # Store identical 3D models once and hardlink the per-part file names to them
+    "dedup_models": True,
+    # Split the library into shard libraries: "off", "category" (by reference designator) or "hash"
+    "shard_mode": "off",
+    # Number of shard libraries in "hash" mode
+    "shard_buckets": 16,
+    # Route the EasyEDA/LCSC API calls of `easyeda2kicad` through a local caching proxy
+    "api_proxy": False,
+    # Serve API calls only from the proxy cache; parts that were never fetched fail
+    "api_offline": False,
+    # URL of an already running proxy (shared or a test stand-in) to use instead of the local one
+    "api_proxy_url": "",
+    # Size limit of the API cache in MiB; least recently used responses are evicted first
+    "api_cache_size_mb": 512,
+    # Hours a cached API response is fresh; stale responses are only served when EasyEDA fails
+    "api_cache_ttl_hours": 168,
+}
+
+## @brief Loads the plugin settings, falling back to the defaults.
+#  @param path Settings file to read, defaults to `SETTINGS_PATH`.
+#  @return A dictionary containing every key of `DEFAULT_SETTINGS`.
+def load_settings(path=None):
+    settings = dict(DEFAULT_SETTINGS)
+    path = path or SETTINGS_PATH
+    if not os.path.exists(path):
+        return settings
+
+    try:
+        with open(path, 'r') as file:
+            overrides = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        print("❗ EasyEDA2KiCAD settings file is corrupted or unreadable, using defaults.")
+        return settings
+
+    if isinstance(overrides, dict):
+        for key, value in overrides.items():
+            if key in DEFAULT_SETTINGS:
+                settings[key] = value
+    return settings
@@ -0,0 +1,238 @@
+import os
+import re
+import sys
+import shutil
+import hashlib
+import argparse
+
+try:
+    from .easyeda2kicad_settings import KICAD_PATH, SETTINGS_PATH, load_settings
+    from .easyeda2kicad_symlib import SymbolLibrary, read_symbols, atomic_write, EMPTY_SYMBOL_LIBRARY
+    from .easyeda2kicad_manifest import ImportManifest
+    from .easyeda2kicad_config import LIBRARY_ENTRIES, get_kicad_config_paths, configure_profile
+except ImportError:
+    from easyeda2kicad_settings import KICAD_PATH, SETTINGS_PATH, load_settings
+    from easyeda2kicad_symlib import SymbolLibrary, read_symbols, atomic_write, EMPTY_SYMBOL_LIBRARY
+    from easyeda2kicad_manifest import ImportManifest
+    from easyeda2kicad_config import LIBRARY_ENTRIES, get_kicad_config_paths, configure_profile
+
+## @brief Ways of splitting the library: one library, by component category or by hash bucket.
+SHARD_MODES = ("off", "category", "hash")
+
+## @brief Shard of each reference designator prefix in `"category"` mode; other prefixes go to `Other`.
+CATEGORY_SHARDS = {
+    "R": "Resistors", "RN": "Resistors", "RV": "Resistors",
+    "C": "Capacitors",
+    "L": "Inductors", "FB": "Inductors", "T": "Inductors",
+    "D": "Diodes",
+    "LED": "Optoelectronics", "DS": "Optoelectronics",
+    "Q": "Transistors",
+    "U": "ICs", "IC": "ICs",
+    "J": "Connectors", "CN": "Connectors", "P": "Connectors", "USB": "Connectors",
+    "SW": "Switches", "S": "Switches", "K": "Switches",
+    "Y": "Crystals", "X": "Crystals",
+    "F": "Protection", "TVS": "Protection",
+}
+
+## @brief Shard of symbols whose reference prefix is not in `CATEGORY_SHARDS`.
+OTHER_SHARD = "Other"
+
+_REFERENCE_PATTERN = re.compile(r'\(property\s+"Reference"\s+"([A-Za-z]+)')
+_LCSC_PATTERN = re.compile(r'\(property\s+"LCSC(?: Part)?"\s+"(C\d+)"')
+_FOOTPRINT_PATTERN = re.compile(r'(\(property\s+"Footprint"\s+")([^":]*):((?:[^"\\]|\\.)*)"')
+
+## @brief Routes parts into shard libraries next to the main library.
+#  @details Shards are named `<main>_<shard>`, e.g. `easyeda2kicad_Resistors` or
+#  `easyeda2kicad_07`, each with its own `.kicad_sym` and `.pretty`. 3D models stay in
+#  the main `.3dshapes` store, so identical models are still shared. The set of
+#  shards is fixed per mode, so they can all be registered in KiCad up front.
+class ShardRouter:
+    ## @brief Creates a router.
+    #  @param output_base Output base path of the main library, e.g. `KICAD_PATH/easyeda2kicad`.
+    #  @param mode `"category"` or `"hash"`.
+    #  @param buckets Number of shards in `"hash"` mode.
+    def __init__(self, output_base, mode="category", buckets=16):
+        if mode not in SHARD_MODES[1:]:
+            raise ValueError(f"Unknown shard mode: {mode}")
+        self.output_base = output_base
+        self.mode = mode
+        self.buckets = max(1, int(buckets))
+
+    ## @brief Returns every shard name of the mode.
+    def shards(self):
+        if self.mode == "hash":
+            width = len(str(self.buckets - 1))
+            return [str(bucket).zfill(width) for bucket in range(self.buckets)]
+        return sorted(set(CATEGORY_SHARDS.values())) + [OTHER_SHARD]
+
+    ## @brief Picks the shard of a part.
+    #  @param part_number LCSC part number, used in `"hash"` mode.
+    #  @param symbols Symbol blocks of the part, whose reference prefix is used in `"category"` mode.
+    def route(self, part_number, symbols):
+        if self.mode == "hash":
+            digest = hashlib.sha256(str(part_number).upper().encode('utf-8')).digest()
+            return self.shards()[int.from_bytes(digest[:4], "big") % self.buckets]
+        for block in symbols.values():
+            match = _REFERENCE_PATTERN.search(block)
+            if match:
+                return CATEGORY_SHARDS.get(match.group(1).upper(), OTHER_SHARD)
+        return OTHER_SHARD
+
+    ## @brief Output base path of a shard library.
+    def library_base(self, shard):
+        return f"{self.output_base}_{shard}"
+
+    ## @brief Output base paths of every shard library.
+    def library_bases(self):
+        return [self.library_base(shard) for shard in self.shards()]
+
+    ## @brief Lib table entries of every shard, keyed like `LIBRARY_ENTRIES`.
+    def library_entries(self):
+        directory = os.path.dirname(self.output_base)
+        entries = {"sym-lib-table": {}, "fp-lib-table": {}}
+        for shard in self.shards():
+            nickname = os.path.basename(self.library_base(shard))
+            # Shards in the plugin folder go through the same path variable as the main library
+            root = "${EASYEDA2KICAD}" if os.path.normpath(directory) == os.path.normpath(KICAD_PATH) else directory.replace(os.sep, "/")
+            entries["sym-lib-table"][nickname] = {
+                "type": "KiCad",
+                "uri": f"{root}/{nickname}.kicad_sym",
+                "options": "",
+                "descr": f"EasyEDA2KiCAD Symbol Library ({shard})",
+            }
+            entries["fp-lib-table"][nickname] = {
+                "type": "KiCad",
+                "uri": f"{root}/{nickname}.pretty",
+                "options": "",
+                "descr": f"EasyEDA2KiCAD Footprint Library ({shard})",
+            }
+        return entries
+
+    ## @brief Creates missing shard libraries and registers all of them in every KiCad version.
+    #  @details KiCad reports missing library files, so empty shards are created up front.
+    #  Registering is cheap when nothing changed, thanks to the configuration fingerprints.
+    #  @return True if a lib table was changed, i.e. KiCad must be restarted to see new shards.
+    def ensure_registered(self):
+        for base in self.library_bases():
+            os.makedirs(base + ".pretty", exist_ok=True)
+            if not os.path.exists(base + ".kicad_sym"):
+                atomic_write(base + ".kicad_sym", EMPTY_SYMBOL_LIBRARY.encode('utf-8'))
+
+        libraries = {table: dict(entries) for table, entries in LIBRARY_ENTRIES.items()}
+        for table, entries in self.library_entries().items():
+            libraries.setdefault(table, {}).update(entries)
+
+        changed = False
+        for config_path in get_kicad_config_paths():
+            results = configure_profile(os.path.dirname(config_path), libraries=libraries)
+            changed = changed or any(status == "updated" for table, status in results.items() if table != "kicad_common.json")
+        return changed
+
+## @brief Returns the shard router configured in the settings, None when sharding is off.
+#  @param output_base Output base path of the main library.
+#  @param settings Plugin settings, loaded from disk by default.
+def get_shard_router(output_base, settings=None):
+    settings = settings if settings is not None else load_settings()
+    if settings["shard_mode"] in (None, "", "off"):
+        return None
+    return ShardRouter(output_base, settings["shard_mode"], settings["shard_buckets"])
+
+## @brief Points the `Footprint` properties of symbol blocks at another footprint library.
+#  @param symbols Dictionary of `name -> symbol block`.
+#  @param old_nickname Footprint library nickname to replace.
+#  @param new_nickname Nickname of the footprint library the footprints now live in.
+#  @return A new dictionary with the rewritten blocks.
+def retarget_footprints(symbols, old_nickname, new_nickname):
+    def replace(match):
+        if match.group(2) != old_nickname:
+            return match.group(0)
+        return f'{match.group(1)}{new_nickname}:{match.group(3)}"'
+    return {name: _FOOTPRINT_PATTERN.sub(replace, block) for name, block in symbols.items()}
+
+## @brief Returns the footprint names of symbol blocks that live in library `nickname`.
+def referenced_footprints(symbols, nickname):
+    names = set()
+    for block in symbols.values():
+        for match in _FOOTPRINT_PATTERN.finditer(block):
+            if match.group(2) == nickname:
+                names.add(match.group(3))
+    return names
+
+## @brief Splits an existing monolithic library into shards.
+#  @details Symbols and their footprints are written to the shards first and only
+#  then removed from the main library, so an interrupted migration never loses a
+#  part; running it again finishes the job.
+#  @param router The `ShardRouter` to use.
+#  @param dry_run Only count the symbols per shard.
+#  @return A dictionary of shard name to the number of symbols moved into it.
+def migrate_library(router, dry_run=False):
+    main_path = router.output_base + ".kicad_sym"
+    nickname = os.path.basename(router.output_base)
+    symbols = read_symbols(main_path) if os.path.exists(main_path) else {}
+
+    # Group symbols per part so a part never ends up split across shards
+    parts = {}
+    for name, block in symbols.items():
+        match = _LCSC_PATTERN.search(block)
+        parts.setdefault(match.group(1) if match else name, {})[name] = block
+
+    moves = {}
+    for part_number, part_symbols in parts.items():
+        moves.setdefault(router.route(part_number, part_symbols), {})[part_number] = part_symbols
+    counts = {shard: sum(len(part_symbols) for part_symbols in shard_parts.values()) for shard, shard_parts in moves.items()}
+    if dry_run or not moves:
+        return counts
+
+    manifest = ImportManifest(router.output_base)
+    relocated = {}
+    moved_footprints = set()
+    for shard, shard_parts in moves.items():
+        base = router.library_base(shard)
+        shard_nickname = os.path.basename(base)
+        os.makedirs(base + ".pretty", exist_ok=True)
+        shard_symbols = {}
+        for part_number, part_symbols in shard_parts.items():
+            for footprint in referenced_footprints(part_symbols, nickname):
+                source = os.path.join(router.output_base + ".pretty", footprint + ".kicad_mod")
+                if os.path.exists(source):
+                    shutil.copyfile(source, os.path.join(base + ".pretty", footprint + ".kicad_mod"))
+                    moved_footprints.add(source)
+            part_symbols = retarget_footprints(part_symbols, nickname, shard_nickname)
+            shard_symbols.update(part_symbols)
+            relocated[part_number] = (base, part_symbols)
+        SymbolLibrary(base + ".kicad_sym").upsert(shard_symbols)
+
+    SymbolLibrary(main_path).remove(list(symbols))
+    for source in moved_footprints:
+        os.remove(source)
+    manifest.relocate(relocated)
+    return counts
+
+## @brief Command-line entry point: splits the main library into shards and registers them.
+def main(argv=None):
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="Split the EasyEDA2KiCAD library into shard libraries.")
+    parser.add_argument("--library", default=os.path.join(KICAD_PATH, "easyeda2kicad"), help="output base path of the main library")
+    parser.add_argument("--mode", choices=SHARD_MODES[1:], default=settings["shard_mode"] if settings["shard_mode"] in SHARD_MODES[1:] else "category")
+    parser.add_argument("--buckets", type=int, default=settings["shard_buckets"], help="number of shards in hash mode")
+    parser.add_argument("--dry-run", action="store_true", help="only report how the symbols would be split")
+    args = parser.parse_args(argv)
+
+    router = ShardRouter(args.library, args.mode, args.buckets)
+    counts = migrate_library(router, dry_run=args.dry_run)
+    for shard, count in sorted(counts.items()):
+        print(f"   {os.path.basename(router.library_base(shard)):<40} {count:>6} symbols")
+    if args.dry_run:
+        print(f"✅ {sum(counts.values())} symbols would be moved into {len(counts)} shards.")
+        return 0
+
+    changed = router.ensure_registered()
+    print(f"✅ {sum(counts.values())} symbols moved into {len(counts)} shards.")
+    if changed:
+        print("✅ Shard libraries added to sym-lib-table and fp-lib-table, restart KiCad to use them.")
+    if settings["shard_mode"] != args.mode:
+        print(f"❗ Set \"shard_mode\": \"{args.mode}\" in {SETTINGS_PATH} so new imports are sharded too.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
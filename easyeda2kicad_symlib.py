@@ -0,0 +1,306 @@
+import os
+import re
+import json
+import mmap
+import bisect
+import tempfile
+import threading
+
+## @brief Header written when a new symbol library has to be created from scratch.
+EMPTY_SYMBOL_LIBRARY = "(kicad_symbol_lib\n  (version 20211014)\n  (generator https://github.com/uPesy/easyeda2kicad.py)\n)\n"
+
+## @brief Version of the on-disk index format; bump to invalidate existing indexes.
+INDEX_VERSION = 1
+
+## @brief Tokens that matter for the structure of an S-expression: quoted strings and parentheses.
+_TOKEN_PATTERN = re.compile(rb'"(?:[^"\\]|\\.)*"|[()]', re.DOTALL)
+
+## @brief Head of a symbol block, capturing its quoted name.
+_SYMBOL_HEAD_PATTERN = re.compile(rb'\(symbol\s+"((?:[^"\\]|\\.)*)"', re.DOTALL)
+
+## @brief Size of the chunks copied while splicing a library.
+_COPY_CHUNK = 1024 * 1024
+
+## @brief Serialises writers of the same library within the KiCad process.
+_library_locks = {}
+_library_locks_lock = threading.Lock()
+
+## @brief Scans a `.kicad_sym` document for its top-level symbols.
+#  @details Works on `bytes` or an `mmap`, so large libraries are never decoded as a
+#  whole. Only direct children of `kicad_symbol_lib` are reported; nested unit
+#  symbols (`"NAME_0_1"`) are part of their parent's span.
+#  @param data Content of the symbol library.
+#  @return A tuple `(symbols, closing)`: a list of `(name, start, end)` byte ranges and
+#  the offset of the parenthesis closing `kicad_symbol_lib` (None if missing).
+def scan_symbols(data):
+    symbols = []
+    closing = None
+    depth = 0
+    block_start = None
+
+    for match in _TOKEN_PATTERN.finditer(data):
+        token = data[match.start()]
+        if token == 0x28:  # "("
+            depth += 1
+            if depth == 2:
+                block_start = match.start()
+        elif token == 0x29:  # ")"
+            if depth == 2 and block_start is not None:
+                head = _SYMBOL_HEAD_PATTERN.match(data, block_start)
+                if head is not None:
+                    symbols.append((_unescape(head.group(1)), block_start, match.end()))
+                block_start = None
+            elif depth == 1:
+                closing = match.start()
+            depth -= 1
+
+    return symbols, closing
+
+## @brief Decodes a quoted S-expression string body.
+def _unescape(raw):
+    return re.sub(rb'\\(.)', rb'\1', raw).decode('utf-8')
+
+## @brief Returns the symbol blocks of a (small) library keyed by name.
+#  @param path Path of the `.kicad_sym` file.
+#  @return An ordered dictionary of `name -> symbol block text`.
+def read_symbols(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    symbols, _ = scan_symbols(data)
+    return {name: data[start:end].decode('utf-8') for name, start, end in symbols}
+
+## @brief Indexed view of a shared `.kicad_sym` library.
+#  @details The byte range of every symbol is kept in a hidden index file next to the
+#  library and only rebuilt when the library's mtime or size no longer matches.
+#  Updates splice the changed spans into a temporary copy that atomically replaces
+#  the library, so the symbols are never re-parsed and a crash cannot leave a
+#  half-written library behind.
+class SymbolLibrary:
+    ## @brief Opens a library; nothing is read until the index is needed.
+    #  @param path Path of the `.kicad_sym` file, created on the first update if missing.
+    def __init__(self, path):
+        self.path = path
+        self.index_path = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".index")
+        self._index = None
+
+    ## @brief Returns the index, rebuilding it if the library changed behind our back.
+    #  @return A dictionary with `symbols` (`name -> [start, end]`) and `closing`.
+    def index(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._index = None
+            return {"symbols": {}, "closing": None}
+
+        if self._index is None or not self._is_fresh(self._index, stat):
+            cached = self._load_index()
+            if cached is not None and self._is_fresh(cached, stat):
+                self._index = cached
+            else:
+                with self.lock:
+                    self._index = self._rebuild_index(os.stat(self.path))
+        return self._index
+
+    ## @brief Lock serialising the updates of the library; hold it while the file is open.
+    @property
+    def lock(self):
+        return _get_library_lock(self.path)
+
+    ## @brief Returns the names of all symbols in library order.
+    def names(self):
+        symbols = self.index()["symbols"]
+        return sorted(symbols, key=lambda name: symbols[name][0])
+
+    ## @brief Tells whether the library holds a symbol.
+    def __contains__(self, name):
+        return name in self.index()["symbols"]
+
+    ## @brief Reads a single symbol block.
+    #  @param name Symbol name.
+    #  @return The symbol block text, or None if the symbol is not in the library.
+    def get(self, name):
+        with self.lock:
+            span = self.index()["symbols"].get(name)
+            if span is None:
+                return None
+            with open(self.path, 'rb') as file:
+                file.seek(span[0])
+                return file.read(span[1] - span[0]).decode('utf-8')
+
+    ## @brief Adds or replaces symbols.
+    #  @param symbols Dictionary of `name -> symbol block text`.
+    def upsert(self, symbols):
+        if symbols:
+            self._update(symbols, ())
+
+    ## @brief Removes symbols; unknown names are ignored.
+    #  @param names Names of the symbols to remove.
+    def remove(self, names):
+        if names:
+            self._update({}, names)
+
+    ## @brief Applies replacements, insertions and removals in one atomic splice.
+    def _update(self, symbols, removed):
+        with self.lock:
+            if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                atomic_write(self.path, EMPTY_SYMBOL_LIBRARY.encode('utf-8'))
+            index = self.index()
+            spans = index["symbols"]
+            closing = index["closing"]
+            if closing is None:
+                raise ValueError(f"Malformed symbol library: {self.path}")
+
+            # Each edit replaces the byte range [start, end) of the current file with named pieces
+            edits = []
+            inserted = []
+            for name, block in symbols.items():
+                if name in spans:
+                    edits.append((spans[name][0], spans[name][1], [(name, block.encode('utf-8'))]))
+                else:
+                    inserted += [(None, b"  "), (name, block.encode('utf-8')), (None, b"\n")]
+            if inserted:
+                edits.append((closing, closing, inserted))
+            removed = [name for name in removed if name in spans and name not in symbols]
+            for name in removed:
+                start, end = self._line_span(spans[name])
+                edits.append((start, end, []))
+            edits.sort(key=lambda edit: edit[0])
+
+            new_spans, segments = self._splice(edits)
+
+            # Shift the untouched spans by the offset of the copied segment holding them
+            segment_starts = [segment[0] for segment in segments]
+            def moved(offset):
+                segment = segments[bisect.bisect_right(segment_starts, offset) - 1]
+                return offset + segment[1]
+
+            new_symbols = {}
+            for name, (start, end) in spans.items():
+                if name not in new_spans and name not in removed:
+                    new_symbols[name] = [moved(start), moved(start) + end - start]
+            new_symbols.update(new_spans)
+            self._save_index({"symbols": new_symbols, "closing": moved(closing)}, os.stat(self.path))
+
+    ## @brief Writes the library with `edits` applied to a temporary file and swaps it in.
+    #  @return A tuple `(new_spans, segments)`: the spans of the written symbols, and a
+    #  sorted list of `(old_start, shift)` for every range copied from the old file.
+    def _splice(self, edits):
+        new_spans = {}
+        segments = []
+        # Like `atomic_write`: follow symlinks and keep the permissions of the library
+        path = os.path.realpath(self.path)
+        directory = os.path.dirname(path) or "."
+        handle, temp_path = tempfile.mkstemp(prefix=".easyeda2kicad-", suffix=".tmp", dir=directory)
+        try:
+            with open(path, 'rb') as source, os.fdopen(handle, 'wb') as target:
+                with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    position = 0
+                    for start, end, pieces in edits + [(len(data), len(data), [])]:
+                        segments.append((position, target.tell() - position))
+                        _copy_range(data, position, start, target)
+                        for name, piece in pieces:
+                            if name is not None:
+                                new_spans[name] = [target.tell(), target.tell() + len(piece)]
+                            target.write(piece)
+                        position = end
+                target.flush()
+                os.fsync(target.fileno())
+                os.chmod(temp_path, os.fstat(source.fileno()).st_mode & 0o7777)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return new_spans, segments
+
+    ## @brief Widens a symbol span to its whole lines, so removals leave no blank line.
+    def _line_span(self, span):
+        with open(self.path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = data.rfind(b"\n", 0, span[0]) + 1
+            end = data.find(b"\n", span[1])
+            end = len(data) if end < 0 else end + 1
+            # Only widen when the symbol is alone on its lines
+            if data[start:span[0]].strip() or data[span[1]:end].strip():
+                return span[0], span[1]
+            return start, end
+
+    ## @brief Scans the library and stores a fresh index.
+    def _rebuild_index(self, stat):
+        with open(self.path, 'rb') as file:
+            if stat.st_size == 0:
+                symbols, closing = [], None
+            else:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    symbols, closing = scan_symbols(data)
+        index = {"symbols": {name: [start, end] for name, start, end in symbols}, "closing": closing}
+        return self._save_index(index, stat)
+
+    ## @brief Stores the index together with the library fingerprint it belongs to.
+    #  @return The stored index.
+    def _save_index(self, index, stat):
+        index = dict(index)
+        index["version"] = INDEX_VERSION
+        index["mtime_ns"] = stat.st_mtime_ns
+        index["size"] = stat.st_size
+        self._index = index
+        try:
+            atomic_write(self.index_path, json.dumps(index).encode('utf-8'))
+        except OSError:
+            # The index is only a cache; an unwritable folder just means rescanning next time
+            pass
+        return index
+
+    ## @brief Loads the on-disk index, None if missing or unreadable.
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r') as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return index if isinstance(index, dict) else None
+
+    ## @brief Tells whether an index still describes the library file.
+    @staticmethod
+    def _is_fresh(index, stat):
+        return (index.get("version") == INDEX_VERSION
+                and index.get("mtime_ns") == stat.st_mtime_ns
+                and index.get("size") == stat.st_size)
+
+## @brief Returns the lock serialising writers of a library.
+#  @details Readers that keep the file open take it as well: on Windows, the
+#  `os.replace` of an update fails while another handle to the library is open.
+def _get_library_lock(path):
+    with _library_locks_lock:
+        return _library_locks.setdefault(os.path.abspath(path), threading.RLock())
+
+## @brief Copies `data[start:end]` to `target` in bounded chunks.
+def _copy_range(data, start, end, target):
+    while start < end:
+        chunk_end = min(end, start + _COPY_CHUNK)
+        target.write(data[start:chunk_end])
+        start = chunk_end
+
+## @brief Writes a file via a temporary file and an atomic rename.
+#  @details Symlinks are followed and the permissions of an existing file are kept.
+def atomic_write(path, content):
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path) or "."
+    handle, temp_path = tempfile.mkstemp(prefix=".easyeda2kicad-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        if os.path.exists(path):
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+## @brief Adds or replaces symbols in a shared symbol library.
+#  @param path Path of the shared `.kicad_sym` file, created if missing.
+#  @param symbols Dictionary of `name -> symbol block text` to store.
+def merge_symbols(path, symbols):
+    SymbolLibrary(path).upsert(symbols)
@@ -0,0 +1,282 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import threading
+
+try:
+    from .easyeda2kicad_settings import KICAD_PATH
+except ImportError:
+    from easyeda2kicad_settings import KICAD_PATH
+
+## @brief Default location of the import log.
+IMPORT_LOG_PATH = os.path.join(KICAD_PATH, "easyeda2kicad.imports.jsonl")
+
+## @brief Library nickname of the output deltas in records written before sharding.
+LEGACY_LIBRARY = "easyeda2kicad"
+
+## @brief `type` of the per-batch records; per-part records have no `type`.
+BATCH_RECORD = "batch"
+
+## @brief Number of trailing stdout characters kept per record.
+STDOUT_TAIL = 2000
+
+## @brief Serialises appends from concurrent imports.
+_log_lock = threading.Lock()
+
+## @brief Takes a size/mtime snapshot of the shared library outputs.
+#  @param output_base Output base path of the shared library.
+#  @return A dictionary per output (`kicad_sym`, `pretty`, `3dshapes`) with `files`, `bytes` and `mtime`.
+def snapshot_outputs(output_base):
+    snapshot = {}
+    try:
+        stat = os.stat(output_base + ".kicad_sym")
+        snapshot["kicad_sym"] = {"files": 1, "bytes": stat.st_size, "mtime": stat.st_mtime}
+    except OSError:
+        snapshot["kicad_sym"] = {"files": 0, "bytes": 0, "mtime": None}
+
+    for key, suffix in (("pretty", ".pretty"), ("3dshapes", ".3dshapes")):
+        files = 0
+        size = 0
+        mtime = None
+        try:
+            with os.scandir(output_base + suffix) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files += 1
+                        size += stat.st_size
+                        mtime = stat.st_mtime if mtime is None else max(mtime, stat.st_mtime)
+        except OSError:
+            pass
+        snapshot[key] = {"files": files, "bytes": size, "mtime": mtime}
+    return snapshot
+
+## @brief Takes `snapshot_outputs` of several libraries, e.g. the main library and its shards.
+#  @param output_bases Output base paths of the libraries.
+#  @return A dictionary of library nickname to snapshot.
+def snapshot_libraries(output_bases):
+    return {os.path.basename(base): snapshot_outputs(base) for base in output_bases}
+
+## @brief Computes the per-library change between two `snapshot_libraries` results.
+#  @return A dictionary of library nickname to the `diff_snapshots` of its outputs.
+def diff_libraries(before, after):
+    return {library: diff_snapshots(before.get(library, {}), snapshot) for library, snapshot in after.items()}
+
+## @brief Computes the per-output change between two snapshots.
+#  @return A dictionary per output with `files`, `bytes` deltas and whether it was `modified`.
+def diff_snapshots(before, after):
+    delta = {}
+    for key, now in after.items():
+        then = before.get(key, {"files": 0, "bytes": 0, "mtime": None})
+        delta[key] = {
+            "files": now["files"] - then["files"],
+            "bytes": now["bytes"] - then["bytes"],
+            "modified": now["mtime"] != then["mtime"],
+            "total_bytes": now["bytes"],
+        }
+    return delta
+
+## @brief Builds the telemetry record of one part.
+#  @param part_number LCSC part number.
+#  @param job The finished `ImportJob`, or None if the part was answered from the manifest.
+#  @param result The part's `BatchResult`.
+#  @param phases Extra phase timings in seconds, e.g. `resolve`.
+#  @param outputs Output deltas per library from `diff_libraries`; batches record them in
+#  their `build_batch_record` instead.
+#  @param batch_id Identifier of the batch the part was imported in.
+def build_record(part_number, job, result, phases, outputs=None, batch_id=None):
+    record = {
+        "timestamp": time.time(),
+        "batch_id": batch_id,
+        "lcsc_id": part_number,
+        "success": bool(result is not None and result.success),
+        "cached": bool(result is not None and result.cached),
+        "message": result.message if result is not None else "",
+        "command": None,
+        "state": None,
+        "returncode": None,
+        "warm": False,
+        "stdout": "",
+        "stderr": "",
+        "phases": dict(phases),
+        "outputs": outputs or {},
+    }
+    if job is not None:
+        record.update({
+            "command": list(job.command),
+            "state": job.state,
+            "returncode": job.returncode,
+            "warm": job.warm,
+            "stdout": (job.stdout or "")[-STDOUT_TAIL:],
+            "stderr": job.stderr or "",
+        })
+        timings = record["phases"]
+        if job.submitted_at is not None and job.started_at is not None:
+            timings["queue"] = job.started_at - job.submitted_at
+        if job.started_at is not None and job.spawned_at is not None:
+            timings["spawn"] = job.spawned_at - job.started_at
+        if job.finished_at is not None:
+            timings["convert"] = job.finished_at - (job.spawned_at or job.started_at or job.finished_at)
+    record["phases"]["total"] = sum(value for key, value in record["phases"].items() if key != "total")
+    return record
+
+## @brief Builds the telemetry record of a whole batch.
+#  @details The merge runs once for all parts of a batch, so its time and the library
+#  growth it caused are recorded here once instead of in every part record.
+#  @param batch_id Identifier shared with the batch's part records.
+#  @param parts Number of parts in the batch.
+#  @param converted Number of parts that were converted rather than answered from the manifest.
+#  @param merge_time Seconds spent merging the staged outputs.
+#  @param outputs Output deltas per library from `diff_libraries`.
+def build_batch_record(batch_id, parts, converted, merge_time, outputs=None):
+    return {
+        "type": BATCH_RECORD,
+        "timestamp": time.time(),
+        "batch_id": batch_id,
+        "parts": parts,
+        "converted": converted,
+        "phases": {"merge": merge_time},
+        "outputs": outputs or {},
+    }
+
+## @brief Appends records to the JSONL import log.
+#  @param records Records from `build_record`.
+#  @param path Log file, defaults to `IMPORT_LOG_PATH`.
+def append_records(records, path=None):
+    if not records:
+        return
+    path = path or IMPORT_LOG_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    lines = "".join(json.dumps(record) + "\n" for record in records)
+    with _log_lock:
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write(lines)
+
+## @brief Reads every well-formed record of an import log.
+#  @param path Log file, defaults to `IMPORT_LOG_PATH`.
+def read_records(path=None):
+    records = []
+    path = path or IMPORT_LOG_PATH
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+    return records
+
+## @brief Returns the `fraction` percentile of a list of numbers (nearest rank).
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+## @brief Aggregates import records into latency, failure and growth statistics.
+#  @param records Records from `read_records`.
+#  @return A JSON-serialisable dictionary.
+def summarize(records):
+    batches = [record for record in records if record.get("type") == BATCH_RECORD]
+    records = [record for record in records if record.get("type") != BATCH_RECORD]
+    converted = [record for record in records if not record.get("cached")]
+    phases = {}
+    # Every batch's merge counts once, however many parts it held
+    for record in converted + [batch for batch in batches if batch.get("converted")]:
+        for phase, seconds in record.get("phases", {}).items():
+            phases.setdefault(phase, []).append(seconds)
+
+    per_part = {}
+    for record in records:
+        part = per_part.setdefault(record.get("lcsc_id"), {"attempts": 0, "failures": 0})
+        part["attempts"] += 1
+        if not record.get("success"):
+            part["failures"] += 1
+    for part in per_part.values():
+        part["failure_rate"] = part["failures"] / part["attempts"]
+
+    # Size of every symbol library after each import, one point per day and library
+    growth = {}
+    for record in sorted(records + batches, key=lambda record: record.get("timestamp", 0)):
+        for library, outputs in _library_outputs(record).items():
+            symbols = outputs.get("kicad_sym")
+            if symbols is None or (not symbols.get("total_bytes") and not symbols.get("modified")):
+                continue
+            day = time.strftime("%Y-%m-%d", time.localtime(record.get("timestamp", 0)))
+            growth.setdefault(day, {})[library] = symbols.get("total_bytes")
+
+    return {
+        "batches": len(batches),
+        "imports": len(records),
+        "cached": len(records) - len(converted),
+        "failures": sum(1 for record in records if not record.get("success")),
+        "failure_rate": (sum(1 for record in records if not record.get("success")) / len(records)) if records else 0.0,
+        "latency": {
+            phase: {"count": len(values), "p50": percentile(values, 0.50), "p95": percentile(values, 0.95)}
+            for phase, values in sorted(phases.items())
+        },
+        "parts": per_part,
+        "library_growth": growth,
+    }
+
+## @brief Returns the output deltas of a record per library.
+#  @details Records written before sharding held the deltas of the main library only.
+#  Part records of a batch leave them to the batch record; older part records carry them.
+def _library_outputs(record):
+    outputs = record.get("outputs") or {}
+    if "kicad_sym" in outputs:
+        return {LEGACY_LIBRARY: outputs}
+    return outputs
+
+## @brief Prints a summary in a human-readable form.
+def print_summary(summary):
+    print(f"Imports: {summary['imports']} in {summary['batches']} batches ({summary['cached']} answered from cache)")
+    print(f"Failures: {summary['failures']} ({summary['failure_rate'] * 100:.1f}%)")
+    print("")
+    print(f"{'Phase':<10} {'Count':>6} {'p50 [s]':>10} {'p95 [s]':>10}")
+    for phase, stats in summary["latency"].items():
+        print(f"{phase:<10} {stats['count']:>6} {stats['p50']:>10.3f} {stats['p95']:>10.3f}")
+
+    failing = {part: stats for part, stats in summary["parts"].items() if stats["failures"]}
+    if failing:
+        print("")
+        print(f"{'Part':<12} {'Attempts':>8} {'Failed':>8} {'Rate':>7}")
+        for part, stats in sorted(failing.items(), key=lambda item: -item[1]["failure_rate"]):
+            print(f"{str(part):<12} {stats['attempts']:>8} {stats['failures']:>8} {stats['failure_rate'] * 100:>6.1f}%")
+
+    if summary["library_growth"]:
+        print("")
+        print("Symbol library size:")
+        for day, libraries in summary["library_growth"].items():
+            for library, size in sorted(libraries.items()):
+                print(f"   {day}  {library:<32} {size / 1024:>10.1f} KiB")
+
+## @brief Command-line entry point: `python easyeda2kicad_telemetry.py [--log PATH] [--json]`.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise EasyEDA2KiCAD import telemetry.")
+    parser.add_argument("--log", default=IMPORT_LOG_PATH, help="import log to read (JSONL)")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    records = read_records(args.log)
+    if not records:
+        print(f"❗ No import records found in {args.log}")
+        return 1
+
+    summary = summarize(records)
+    if args.json:
+        json.dump(summary, sys.stdout, indent=4)
+        print("")
+    else:
+        print_summary(summary)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
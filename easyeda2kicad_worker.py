@@ -0,0 +1,401 @@
+import os
+import io
+import sys
+import json
+import runpy
+import logging
+import atexit
+import threading
+import traceback
+import subprocess
+import contextlib
+
+# NOTE: This module doubles as the worker script executed by the pipx venv's own
+# Python (`python -I easyeda2kicad_worker.py`), so it must only use the standard
+# library and must not import any other plugin module.
+
+## @brief Raised when the warm worker cannot be started in the `easyeda2kicad` venv.
+class WorkerUnavailable(Exception):
+    pass
+
+## @brief Raised when the warm worker process exits while a job is running.
+class WorkerCrashed(Exception):
+    ## @param message Summary of the crash.
+    #  @param stderr What the worker wrote to its stderr while running the job.
+    def __init__(self, message, stderr=""):
+        super().__init__(message)
+        self.stderr = stderr
+
+## @brief Raised when a job exceeds its timeout; the worker has been killed.
+class WorkerTimeout(Exception):
+    pass
+
+## @brief Number of trailing worker stderr characters kept for crash reports.
+STDERR_TAIL = 16000
+
+## @brief Collects the tail of a worker's stderr on a background thread.
+#  @details Job output is captured inside the worker, so the pipe only carries what
+#  bypasses that capture: fatal errors, faulthandler tracebacks and native libraries
+#  writing to file descriptor 2.
+class StderrTail:
+    ## @brief Starts draining `stream`.
+    #  @param stream The worker's stderr pipe (text mode).
+    #  @param limit Number of trailing characters kept.
+    def __init__(self, stream, limit=STDERR_TAIL):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._text = ""
+        self._written = 0
+        self._thread = threading.Thread(target=self._pump, args=(stream,), name="easyeda2kicad-worker-stderr", daemon=True)
+        self._thread.start()
+
+    ## @brief Returns a mark for `since()`.
+    def mark(self):
+        with self._lock:
+            return self._written
+
+    ## @brief Returns what was written after `mark`, as far as it is still kept.
+    #  @param wait Seconds to wait for the pipe to close first, e.g. after the worker died.
+    def since(self, mark, wait=0):
+        if wait:
+            self._thread.join(wait)
+        with self._lock:
+            count = min(self._written - mark, len(self._text))
+            return self._text[len(self._text) - count:] if count > 0 else ""
+
+    def _pump(self, stream):
+        try:
+            for line in stream:
+                with self._lock:
+                    self._text = (self._text + line)[-self.limit:]
+                    self._written += len(line)
+        except (OSError, ValueError):
+            pass
+
+## @brief Picks the line of a worker's stderr that best explains a crash.
+#  @details faulthandler reports end with a traceback, so its headline is preferred.
+def _summary_line(output):
+    lines = [line.strip() for line in output.splitlines() if line.strip()]
+    for line in lines:
+        if line.startswith("Fatal Python error"):
+            return line
+    return lines[-1] if lines else ""
+
+## @brief Locates the Python interpreter of the venv `easyeda2kicad` was installed into.
+#  @param easyeda2kicad_path Path returned by `get_easyeda2kicad_path()`.
+#  @return Path of the venv's Python, or None if it cannot be determined.
+def find_venv_python(easyeda2kicad_path):
+    executable = "python.exe" if os.name == 'nt' else "python"
+
+    # pipx exposes the command as a symlink (Linux/macOS) into the venv's bin folder
+    candidates = [os.path.join(os.path.dirname(os.path.realpath(easyeda2kicad_path)), executable)]
+
+    # On Windows the command is a copied launcher, so look in the known pipx venv folders
+    pipx_homes = [os.environ.get("PIPX_HOME", "")]
+    pipx_homes += [
+        os.path.expanduser(os.path.join("~", ".local", "share", "pipx")),
+        os.path.expanduser(os.path.join("~", ".local", "pipx")),
+        os.path.expanduser(os.path.join("~", "pipx")),
+    ]
+    scripts = "Scripts" if os.name == 'nt' else "bin"
+    for home in pipx_homes:
+        if home:
+            candidates.append(os.path.join(home, "venvs", "easyeda2kicad", scripts, executable))
+
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+## @brief A long-lived `easyeda2kicad` process that converts parts sent as JSON lines.
+#  @details The process is started lazily on the first job and stopped after
+#  `idle_timeout` seconds without work. One converter runs one job at a time.
+class WarmConverter:
+    ## @brief Creates the converter without starting it.
+    #  @param python_path Python interpreter of the `easyeda2kicad` venv.
+    #  @param env Environment for the worker process.
+    #  @param idle_timeout Seconds of inactivity before the worker is shut down.
+    def __init__(self, python_path, env=None, idle_timeout=300):
+        self.python_path = python_path
+        self.env = env
+        self.idle_timeout = idle_timeout
+        self.process = None
+        self._lock = threading.Lock()
+        self._idle_timer = None
+        self._next_id = 0
+        self._stderr = None
+
+    ## @brief Starts the worker process if it is not running yet.
+    #  @throws WorkerUnavailable if the worker cannot load `easyeda2kicad`.
+    def ensure_started(self):
+        with self._lock:
+            self._cancel_idle_timer()
+            if self.process is not None and self.process.poll() is None:
+                return self.process
+
+            # `-I` keeps the worker isolated from the user's site and PYTHON* variables;
+            # faulthandler dumps a traceback to stderr if the converter crashes hard
+            try:
+                self.process = subprocess.Popen(
+                    [self.python_path, "-I", "-X", "faulthandler", os.path.abspath(__file__)],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    encoding='utf-8',
+                    errors='replace',
+                    env=self.env
+                )
+            except OSError as e:
+                raise WorkerUnavailable(str(e))
+            self._stderr = StderrTail(self.process.stderr)
+
+            ready = self._read_reply(self.process)
+            if not ready or not ready.get("ready"):
+                self._kill()
+                error = (ready or {}).get("error")
+                if error is None:
+                    summary = _summary_line(self._stderr.since(0, wait=1))
+                    error = "worker exited during startup" + (f": {summary}" if summary else "")
+                raise WorkerUnavailable(error)
+            return self.process
+
+    ## @brief Runs one `easyeda2kicad` invocation in the worker.
+    #  @param argv Command-line arguments, without the executable.
+    #  @param timeout Seconds before the worker is killed, None to wait forever.
+    #  @return A tuple `(returncode, stdout, stderr)`.
+    #  @throws WorkerCrashed if the worker exits (or is killed) during the job.
+    #  @throws WorkerTimeout if the job exceeds `timeout`.
+    def run(self, argv, timeout=None):
+        process = self.ensure_started()
+        stderr = self._stderr
+        mark = stderr.mark()
+        self._next_id += 1
+        request = {"id": self._next_id, "argv": list(argv)}
+
+        timed_out = threading.Event()
+        def on_timeout():
+            timed_out.set()
+            self._kill()
+        watchdog = threading.Timer(timeout, on_timeout) if timeout else None
+
+        try:
+            if watchdog is not None:
+                watchdog.daemon = True
+                watchdog.start()
+            process.stdin.write(json.dumps(request) + "\n")
+            process.stdin.flush()
+            reply = self._read_reply(process)
+        except (OSError, ValueError):
+            reply = None
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+
+        if timed_out.is_set():
+            raise WorkerTimeout(f"conversion exceeded {timeout} seconds")
+        if reply is None or reply.get("id") != request["id"]:
+            self._kill()
+            output = stderr.since(mark, wait=1)
+            message = f"easyeda2kicad worker exited unexpectedly (exit code {process.returncode})"
+            summary = _summary_line(output)
+            raise WorkerCrashed(message + (f": {summary}" if summary else ""), output)
+
+        self._schedule_idle_stop()
+        # Output that bypassed the worker's capture, e.g. from native code, belongs to this job too
+        return reply.get("returncode", 1), reply.get("stdout", ""), reply.get("stderr", "") + stderr.since(mark)
+
+    ## @brief Stops the worker process.
+    def stop(self):
+        with self._lock:
+            self._cancel_idle_timer()
+            process = self.process
+            self.process = None
+        if process is not None and process.poll() is None:
+            try:
+                # Closing stdin lets the worker leave its request loop cleanly
+                process.stdin.close()
+                process.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+
+    ## @brief Reads one JSON reply line from the worker, None on EOF or garbage.
+    def _read_reply(self, process):
+        try:
+            line = process.stdout.readline()
+        except (OSError, ValueError):
+            return None
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            return None
+
+    ## @brief Kills the worker process and reaps it, so the next job starts a fresh one.
+    def _kill(self):
+        process = self.process
+        if process is not None:
+            try:
+                process.kill()
+                process.wait()
+            except OSError:
+                pass
+
+    ## @brief Arms the timer that stops the worker after `idle_timeout` seconds.
+    def _schedule_idle_stop(self):
+        with self._lock:
+            self._cancel_idle_timer()
+            if self.idle_timeout:
+                self._idle_timer = threading.Timer(self.idle_timeout, self.stop)
+                self._idle_timer.daemon = True
+                self._idle_timer.start()
+
+    ## @brief Disarms the idle timer; the caller holds `_lock`.
+    def _cancel_idle_timer(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+## @brief Set of `WarmConverter`s shared by concurrent import jobs.
+class WarmConverterPool:
+    ## @brief Creates an empty pool.
+    #  @param python_path Python interpreter of the `easyeda2kicad` venv.
+    #  @param env Environment for the worker processes.
+    #  @param idle_timeout Seconds of inactivity before a worker is shut down.
+    def __init__(self, python_path, env=None, idle_timeout=300):
+        self.python_path = python_path
+        self.env = env
+        self.idle_timeout = idle_timeout
+        # Cleared when the venv cannot host a worker, so jobs fall back to plain processes
+        self.available = True
+        self._lock = threading.Lock()
+        self._idle = []
+        self._all = []
+
+    ## @brief Takes an idle converter, or creates one if all are busy.
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            converter = WarmConverter(self.python_path, self.env, self.idle_timeout)
+            self._all.append(converter)
+            return converter
+
+    ## @brief Returns a converter to the pool after a job.
+    def release(self, converter):
+        with self._lock:
+            self._idle.append(converter)
+
+    ## @brief Stops every worker process of the pool.
+    def shutdown(self):
+        with self._lock:
+            converters = list(self._all)
+        for converter in converters:
+            converter.stop()
+
+## @brief Warm converter pools keyed by venv interpreter and API proxy.
+_pools = {}
+_pools_lock = threading.Lock()
+
+## @brief Returns the shared warm converter pool for an `easyeda2kicad` installation.
+#  @param easyeda2kicad_path Path returned by `get_easyeda2kicad_path()`.
+#  @param env Environment for the worker processes.
+#  @param idle_timeout Seconds of inactivity before a worker is shut down.
+#  @return The pool, or None if the venv's Python cannot be located.
+def get_converter_pool(easyeda2kicad_path, env=None, idle_timeout=300):
+    python_path = find_venv_python(easyeda2kicad_path)
+    if python_path is None:
+        return None
+    # Workers of a previous proxy setting keep their environment and simply idle out
+    key = (python_path, (env or {}).get("EASYEDA2KICAD_PROXY"))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = WarmConverterPool(python_path, env, idle_timeout)
+            _pools[key] = pool
+            atexit.register(pool.shutdown)
+        return pool
+
+## @brief Loads the `easyeda2kicad` console entry point inside the venv.
+def _load_entry_point():
+    try:
+        from importlib.metadata import entry_points
+        try:
+            scripts = entry_points(group="console_scripts")
+        except TypeError:
+            # Python < 3.10 returns a dictionary of groups
+            scripts = entry_points().get("console_scripts", [])
+        for entry_point in scripts:
+            if entry_point.name == "easyeda2kicad":
+                return entry_point.load()
+    except ImportError:
+        pass
+
+    from easyeda2kicad.__main__ import main
+    return main
+
+## @brief Runs a single request in the worker and captures its output.
+def _handle_request(entry_point, request):
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    root_logger = logging.getLogger()
+    handlers = list(root_logger.handlers)
+
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            returncode = entry_point(request.get("argv", []))
+        except SystemExit as e:
+            returncode = e.code
+        except Exception:
+            traceback.print_exc()
+            returncode = 1
+        finally:
+            # easyeda2kicad attaches a new log handler per call; drop them between jobs
+            for handler in list(root_logger.handlers):
+                if handler not in handlers:
+                    root_logger.removeHandler(handler)
+
+    if returncode is None:
+        returncode = 0
+    elif not isinstance(returncode, int):
+        returncode = 1
+    return {"id": request.get("id"), "returncode": returncode, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+## @brief Worker main loop: answers one JSON request per line until stdin closes.
+def serve():
+    protocol_in = sys.stdin
+    protocol_out = sys.stdout
+
+    def reply(message):
+        protocol_out.write(json.dumps(message) + "\n")
+        protocol_out.flush()
+
+    # `-I` ignores PYTHONPATH, so the API proxy hook (see easyeda2kicad_proxy) is applied by hand
+    hook = os.environ.get("EASYEDA2KICAD_PROXY_HOOK")
+    if hook and os.path.exists(hook):
+        try:
+            runpy.run_path(hook)
+        except Exception:
+            pass
+
+    try:
+        entry_point = _load_entry_point()
+    except Exception as e:
+        reply({"ready": False, "error": f"cannot load easyeda2kicad: {e}"})
+        return 1
+    reply({"ready": True, "pid": os.getpid()})
+
+    for line in protocol_in:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        reply(_handle_request(entry_point, request))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(serve())
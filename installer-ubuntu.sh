@@ -64,8 +64,8 @@ if [ -z "$EASYEDA2KICAD_PATH" ]; then
     exit 1
 fi
 
-# Download initial symbol (C7272)
-"$EASYEDA2KICAD_PATH" --lcsc_id C7472 --full --overwrite --output "$KICAD_PATH/easyeda2kicad"
+# Download initial symbol (C7272) through the plugin's staging path, which keeps deduplicated 3D models intact
+python3 "$(dirname "$0")/easyeda2kicad_batch.py" C7472 --force --easyeda2kicad "$EASYEDA2KICAD_PATH" --output "$KICAD_PATH/easyeda2kicad"
 
 # Success message
 echo "✅ EasyEDA2KiCAD setup complete! Library created in: $KICAD_PATH"
@@ -55,8 +55,8 @@ if not exist "%KICA_FOLDER_PATH%" mkdir "%KICA_FOLDER_PATH%"
 set KICAD_PATH=%KICA_FOLDER_PATH%\easyeda2kicad
 if not exist "%KICAD_FOLDER_PATH%" mkdir "%KICAD_FOLDER_PATH%"
 
-REM Download initial symbol (C7272)
-easyeda2kicad --lcsc_id C7472 --full --overwrite --output "%KICAD_PATH%"
+REM Download initial symbol (C7272) through the plugin's staging path, which keeps deduplicated 3D models intact
+python "%~dp0easyeda2kicad_batch.py" C7472 --force --output "%KICAD_PATH%"
 
 REM Success message
 echo ✅ EasyEDA2KiCAD setup complete! Library created in: %KICAD_PATH%